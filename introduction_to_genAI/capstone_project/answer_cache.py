@@ -0,0 +1,251 @@
+from typing import Optional, List, Dict, Set
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+import math
+import re
+import time
+
+# Words that don't change what is being asked; "weather", "forecast" etc. are
+# common too but are left to IDF weighting
+STOPWORDS = frozenset(
+    "a about an and any are at be can could do does for going how i in is it "
+    "like me my of on please right s so tell the there this to what whats "
+    "will with would you".split()
+)
+TOKEN_PATTERN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+# Candidates are only scored if they share one of the query's rarest words
+CANDIDATE_WORDS = 2
+# Re-weight stored vectors once this share of entries was added or removed
+REWEIGH_FRACTION = 0.1
+# Spelling similarity (0-1) at which two words count as the same (typos, plurals)
+SAME_WORD_RATIO = 0.8
+
+
+def question_words(text: str) -> List[str]:
+    """Lowercase content words and numbers of a question"""
+    return [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def question_features(words: List[str]) -> Counter:
+    """Word and character trigram counts; trigrams tolerate typos and plurals"""
+    features = Counter(f"w:{word}" for word in words)
+    for word in words:
+        padded = f" {word} "
+        features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def same_word(a: str, b: str) -> bool:
+    """Identical, or a close spelling starting with the same letter ("denvr", "alerts")"""
+    if a == b:
+        return True
+    return a[0] == b[0] and SequenceMatcher(None, a, b).ratio() >= SAME_WORD_RATIO
+
+
+def words_correspond(a: Set[str], b: Set[str]) -> bool:
+    """Every word of each question has a counterpart in the other
+
+    Similarity alone lets a question match a longer one that contains it
+    ("Virginia" vs "West Virginia", "York" vs "New York"), which is a
+    different place.
+    """
+    return (all(any(same_word(x, y) for y in b) for x in a)
+            and all(any(same_word(y, x) for x in a) for y in b))
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    features: Counter
+    vector: Dict[str, float]  # TF-IDF weights, unit length
+    words: Set[str]
+    numbers: frozenset
+    expires_at: float
+
+
+class AnswerCache:
+    """Answers to earlier questions, matched by TF-IDF cosine similarity
+
+    Questions are turned into sparse vectors of words and character
+    trigrams. IDF comes from the cached questions themselves, so shared words
+    like "weather" count for little and place names decide the match. An
+    answer is reused when similarity reaches `threshold`, every word of
+    either question has a counterpart in the other (see words_correspond),
+    the numbers in both are identical (dates, coordinates) and it is still
+    fresh.
+
+    Stored vectors are kept normalized, so scoring is a sparse dot product
+    over the query's features; they are re-weighted when the IDF has drifted
+    (see REWEIGH_FRACTION). An inverted index over words keeps lookups to a
+    few candidates.
+
+    Args:
+        max_entries: Answers kept before the least recently used is dropped
+        threshold: Minimum cosine similarity (0-1) for a hit
+        default_ttl: Freshness in seconds for answers that used no tools
+    """
+
+    def __init__(self, max_entries: int = 500, threshold: float = 0.85, default_ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.default_ttl = default_ttl
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._by_word: Dict[str, Set[int]] = {}
+        self._document_frequency: Counter = Counter()
+        self._idf: Dict[str, float] = {}
+        self._unseen_idf = 1.0
+        self._changes = 0  # entries added or removed since the last re-weighting
+        self._next_id = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _vector(self, features: Counter) -> Dict[str, float]:
+        """Unit-length TF-IDF vector using the current IDF table"""
+        weights = {feature: count * self._idf.get(feature, self._unseen_idf)
+                   for feature, count in features.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {feature: weight / norm for feature, weight in weights.items()}
+
+    def _reweigh(self):
+        """Recompute IDF from the cached questions and re-weight every entry"""
+        count = len(self._entries)
+        self._idf = {feature: math.log((1 + count) / (1 + frequency)) + 1
+                     for feature, frequency in self._document_frequency.items()}
+        self._unseen_idf = math.log(1 + count) + 1
+        for entry in self._entries.values():
+            entry.vector = self._vector(entry.features)
+        self._changes = 0
+
+    def _candidates(self, words: List[str]) -> Set[int]:
+        # Unknown words (new places, typos) can't narrow the search
+        known = [word for word in set(words) if word in self._by_word]
+        rarest = sorted(known, key=lambda word: len(self._by_word[word]))[:CANDIDATE_WORDS]
+        candidates = set()
+        for word in rarest:
+            candidates |= self._by_word[word]
+        return candidates
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Cached answer to a similar enough question, or None"""
+        if self._changes > REWEIGH_FRACTION * len(self._entries):
+            self._reweigh()
+        words = question_words(question)
+        word_set = set(words)
+        numbers = frozenset(word for word in words if word[0].isdigit())
+        query = self._vector(question_features(words))
+        now = time.monotonic()
+
+        best_id, best_score = None, self.threshold
+        for entry_id in self._candidates(words):
+            entry = self._entries[entry_id]
+            if entry.expires_at < now:
+                self._remove(entry_id)
+                continue
+            if entry.numbers != numbers:
+                continue
+            vector = entry.vector
+            score = sum(weight * vector.get(feature, 0.0) for feature, weight in query.items())
+            if score >= best_score and words_correspond(word_set, entry.words):
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best_id)
+        self.hits += 1
+        return self._entries[best_id].answer
+
+    def store(self, question: str, answer: str, ttl: Optional[float] = None):
+        """Cache an answer for `ttl` seconds (default_ttl if not given)"""
+        ttl = self.default_ttl if ttl is None else ttl
+        words = question_words(question)
+        if ttl <= 0 or not words:
+            return
+
+        entry_id, self._next_id = self._next_id, self._next_id + 1
+        features = question_features(words)
+        self._entries[entry_id] = CachedAnswer(
+            question=question,
+            answer=answer,
+            features=features,
+            vector=self._vector(features),
+            words=set(words),
+            numbers=frozenset(word for word in words if word[0].isdigit()),
+            expires_at=time.monotonic() + ttl,
+        )
+        for word in set(words):
+            self._by_word.setdefault(word, set()).add(entry_id)
+        self._document_frequency.update(features.keys())
+        self._changes += 1
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._changes += 1
+        for word in entry.words:
+            ids = self._by_word[word]
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_word[word]
+        for feature in entry.features:
+            self._document_frequency[feature] -= 1
+            if not self._document_frequency[feature]:
+                del self._document_frequency[feature]
+
+    def clear(self):
+        self._entries.clear()
+        self._by_word.clear()
+        self._document_frequency.clear()
+        self._idf = {}
+        self._changes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+
+if __name__ == "__main__":
+    # Regression check: python answer_cache.py exits non-zero on a wrong answer
+    SAME = [
+        ("weather in Denver tomorrow?", "Denver weather tomorrow"),
+        ("Any alerts in Texas?", "alerts in texas"),
+        ("What's the forecast for West Virginia?", "forecast for west virginia please"),
+    ]
+    DIFFERENT = [
+        ("weather in West Virginia", "weather in Virginia"),
+        ("weather in Kansas City?", "weather in Kansas?"),
+        ("forecast for New York", "forecast for York"),
+        ("weather in Kansas", "weather in Arkansas"),
+        ("weather in Boston", "weather in Austin"),
+    ]
+    failures = []
+    for pairs, expect_hit in ((SAME, True), (DIFFERENT, False)):
+        for cached, asked in pairs:
+            # Both on their own and among the other questions, which shifts the IDF
+            for others in ((), [q for pair in SAME + DIFFERENT for q in pair if q not in (cached, asked)]):
+                cache = AnswerCache()
+                for other in others:
+                    cache.store(other, other)
+                cache.store(cached, cached)
+                answer = cache.lookup(asked)
+                if (answer == cached) != expect_hit:
+                    failures.append(f"{asked!r} -> {answer!r} (cached {cached!r})")
+    print("\n".join(failures) or "OK")
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,191 @@
+"""Load-test the agent offline against the fake model and fake tool server.
+
+Runs N concurrent conversations through a SessionManager in phases of T
+turns each. After every phase it reports queries/sec, p50/p95/p99 query
+latency, where the time went (model, tools, queueing) and the memory still
+held, so growth over long sessions shows up phase by phase. Memory is the
+process RSS, or the Python heap with --trace-memory (exact, but roughly
+halves throughput).
+
+With --responsiveness it instead checks that model calls don't block the
+event loop: a ticker task must keep running on time while several slow
+queries (--first-token) are in flight, and they must overlap rather than
+run one after another. Exits non-zero if not.
+
+Usage:
+    python bench_agent.py [--conversations N] [--phases P] [--turns T] [--pool-size S]
+                          [--tool-rounds R] [--tools-per-round K] [--first-token MS]
+                          [--delta-delay MS] [--deltas D] [--tool-delay MS] [--result-size C]
+                          [--trace-memory] [--metrics-out FILE]
+    python bench_agent.py --responsiveness [--queries N] [--first-token MS]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import time
+import tracemalloc
+
+from bench_common import report
+from client import WeatherMCPClient
+from fake_services import start_fake_model, start_fake_tools
+from session_manager import SessionManager
+
+MODEL_PORT = 8790
+TOOLS_PORT = 8791
+# Responsiveness check: ticker period, and the longest stall allowed between ticks
+TICK_INTERVAL = 0.01
+MAX_TICK_GAP = 0.1
+
+
+async def run_phase(manager: SessionManager, conversations: int, turns: int, first_turn: int) -> tuple[float, list[float], list]:
+    """Each conversation asks `turns` questions in order; conversations run concurrently"""
+    latencies: list[float] = []
+    responses = []
+
+    async def conversation(c: int):
+        for turn in range(first_turn, first_turn + turns):
+            start = time.perf_counter()
+            response = await manager.process_query(f"user-{c}", f"Conversation {c}, question {turn}: any weather news?")
+            latencies.append(time.perf_counter() - start)
+            responses.append(response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation(c) for c in range(conversations)))
+    return time.perf_counter() - start, latencies, responses
+
+
+def memory_bytes(trace: bool) -> int | None:
+    """Python heap in use (tracemalloc) or resident set size, if available"""
+    if trace:
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def mean_metric(responses: list, key: str) -> float:
+    values = [r.metrics.get(key, 0.0) for r in responses if r.metrics]
+    return sum(values) / len(values) if values else 0.0
+
+
+async def bench_agent(args, tools_url: str):
+    async with SessionManager(pool_size=args.pool_size) as manager:
+        connected = await manager.connect(tools_url)
+        if not connected.success:
+            raise SystemExit(connected.error)
+
+        if args.trace_memory:
+            tracemalloc.start()
+        baseline = None
+        for phase in range(args.phases):
+            elapsed, latencies, responses = await run_phase(manager, args.conversations, args.turns,
+                                                            phase * args.turns)
+            retained = memory_bytes(args.trace_memory)
+            if baseline is None:
+                baseline = retained
+
+            errors = sum(1 for r in responses if not r.success)
+            report(f"phase {phase + 1}", elapsed, latencies)
+            print(f"{'':<10} model {mean_metric(responses, 'llm_seconds') * 1000:>7.1f} ms   "
+                  f"tools {mean_metric(responses, 'tool_seconds') * 1000:>7.1f} ms   "
+                  f"queued {mean_metric(responses, 'queue_wait_seconds') * 1000:>7.1f} ms   "
+                  f"errors {errors}")
+            if retained is not None:
+                print(f"{'':<10} memory {retained / 1024:>8.0f} KiB   "
+                      f"growth {(retained - baseline) / 1024:>+8.0f} KiB")
+            if args.metrics_out:
+                manager.metrics.write_jsonl(args.metrics_out)
+        if args.trace_memory:
+            tracemalloc.stop()
+
+        print(f"stats      {manager.stats()}")
+
+
+async def check_responsiveness(args, tools_url: str):
+    """Run slow queries concurrently while a ticker measures event loop stalls"""
+    ticks = 0
+    longest_gap = 0.0
+
+    async def ticker():
+        nonlocal ticks, longest_gap
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(TICK_INTERVAL)
+            now = time.perf_counter()
+            longest_gap = max(longest_gap, now - last)
+            last = now
+            ticks += 1
+
+    async with WeatherMCPClient(health_check_interval=0) as client:
+        connected = await client.connect(tools_url)
+        if not connected.success:
+            raise SystemExit(connected.error)
+
+        tick_task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        queries = args.queries
+        # Separate forks so the queries don't share (and serialize on) one conversation
+        responses = await asyncio.gather(*(client.fork().process_query(f"Question {i}: any alerts?")
+                                           for i in range(queries)))
+        elapsed = time.perf_counter() - start
+        tick_task.cancel()
+
+    # A query makes tool_rounds + 1 model calls, each at least --first-token long
+    one_query = (args.tool_rounds + 1) * args.first_token / 1000
+    print(f"{queries} queries in {elapsed:.2f}s (one alone takes >= {one_query:.2f}s), "
+          f"{ticks} ticks, longest gap {longest_gap * 1000:.1f} ms")
+
+    problems = []
+    if not all(response.success for response in responses):
+        problems.append("a query failed: " + next(r.error for r in responses if not r.success))
+    if longest_gap > MAX_TICK_GAP:
+        problems.append(f"the event loop stalled for {longest_gap * 1000:.0f} ms")
+    if queries > 1 and elapsed > 2 * one_query:
+        problems.append("queries ran one after another instead of concurrently")
+    if problems:
+        raise SystemExit("FAIL: " + "; ".join(problems))
+    print("OK: other tasks kept running during the model calls")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=50, help="Concurrent conversations")
+    parser.add_argument("--phases", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=4, help="Questions per conversation per phase")
+    parser.add_argument("--pool-size", type=int, default=4, help="MCP sessions shared by all conversations")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="Tool rounds before each answer")
+    parser.add_argument("--tools-per-round", type=int, default=2)
+    parser.add_argument("--first-token", type=float, default=200, help="Model delay before streaming (ms)")
+    parser.add_argument("--delta-delay", type=float, default=10, help="Delay between text deltas (ms)")
+    parser.add_argument("--deltas", type=int, default=12, help="Text deltas per answer")
+    parser.add_argument("--tool-delay", type=float, default=50, help="Tool latency (ms)")
+    parser.add_argument("--result-size", type=int, default=1000, help="Characters per tool result")
+    parser.add_argument("--trace-memory", action="store_true", help="Measure the Python heap with tracemalloc")
+    parser.add_argument("--metrics-out", default=None, help="Append aggregated metrics as JSON lines")
+    parser.add_argument("--responsiveness", action="store_true",
+                        help="Check that slow model calls don't block other tasks, then exit")
+    parser.add_argument("--queries", type=int, default=3, help="Concurrent queries for --responsiveness")
+    args = parser.parse_args()
+
+    model, model_url = start_fake_model(port=MODEL_PORT, tool_rounds=args.tool_rounds,
+                                        tools_per_round=args.tools_per_round,
+                                        first_token_delay=args.first_token / 1000,
+                                        delta_delay=args.delta_delay / 1000, deltas=args.deltas)
+    tools, tools_url = start_fake_tools(port=TOOLS_PORT, delay=args.tool_delay / 1000,
+                                        result_size=args.result_size)
+
+    # Never reach the real API from a load test
+    os.environ["ANTHROPIC_BASE_URL"] = model_url
+    os.environ["ANTHROPIC_API_KEY"] = "fake"
+    try:
+        if args.responsiveness:
+            asyncio.run(check_responsiveness(args, tools_url))
+        else:
+            asyncio.run(bench_agent(args, tools_url))
+    finally:
+        model.terminate()
+        tools.terminate()
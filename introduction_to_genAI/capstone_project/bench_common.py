@@ -0,0 +1,15 @@
+"""Reporting helpers shared by the benchmark scripts."""
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label: str, elapsed: float, latencies: list[float]):
+    print(f"{label:<10} {len(latencies) / elapsed:>10.1f} req/s   "
+          f"p50 {percentile(latencies, 50) * 1000:>7.2f} ms   "
+          f"p95 {percentile(latencies, 95) * 1000:>7.2f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:>7.2f} ms")
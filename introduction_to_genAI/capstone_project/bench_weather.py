@@ -0,0 +1,128 @@
+"""Benchmark the weather server against the local NWS replay server.
+
+client: compares a fresh httpx client per request (no server lifespan)
+        with the shared, pooled client opened by the server lifespan.
+tools:  calls the FastMCP tools concurrently and reports throughput,
+        p50/p95/p99 latency and allocations per call.
+
+Usage:
+    python bench_weather.py client [--requests N] [--concurrency C]
+    python bench_weather.py tools [--calls N] [--concurrency C] [--latency MS] [--error-rate F]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import weather
+from bench_common import report
+from nws_replay import start_replay_server
+
+REPLAY_PORT = 8765
+
+# A mix of tool calls resembling real traffic
+STATES = ["CA", "TX", "FL", "NY", "CO", "WA", "IL", "AZ"]
+LOCATIONS = [
+    (39.7392, -104.9903), (40.7128, -74.0060), (34.0522, -118.2437), (41.8781, -87.6298),
+    (29.7604, -95.3698), (47.6062, -122.3321), (33.4484, -112.0740), (25.7617, -80.1918),
+]
+
+
+async def run_load(total: int, concurrency: int, call) -> tuple[float, list[float]]:
+    """Await `call(i)` `total` times with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, latencies
+
+
+async def bench_client(base_url: str, total: int, concurrency: int):
+    # Distinct URLs and no response cache, so every call reaches the server
+    weather.response_cache.max_entries = 0
+
+    async def call(i: int):
+        await weather.make_nws_request(f"{base_url}/points/39.7,-104.{i}")
+
+    # Before: no lifespan, so every request opens its own client
+    elapsed, latencies = await run_load(total, concurrency, call)
+    report("per-call", elapsed, latencies)
+
+    # After: shared keep-alive pool, as inside the running server
+    async with weather.server_lifespan(weather.mcp):
+        elapsed, latencies = await run_load(total, concurrency, call)
+    report("pooled", elapsed, latencies)
+
+
+async def bench_tools(total: int, concurrency: int):
+    rng = random.Random(42)
+    calls = []
+    for _ in range(total):
+        if rng.random() < 0.5:
+            latitude, longitude = rng.choice(LOCATIONS)
+            calls.append(("get_forecast", {"latitude": latitude, "longitude": longitude}))
+        else:
+            calls.append(("get_alerts", {"state": rng.choice(STATES)}))
+
+    async def call(i: int):
+        name, arguments = calls[i]
+        await weather.mcp.call_tool(name, arguments)
+
+    async with weather.server_lifespan(weather.mcp):
+        # Warm up imports and connections outside the measurement
+        await run_load(min(total, 20), concurrency, call)
+
+        tracemalloc.start()
+        elapsed, latencies = await run_load(total, concurrency, call)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    report("tools", elapsed, latencies)
+    print(f"memory     peak {peak / 1024:.0f} KiB   retained {retained / 1024:.0f} KiB   "
+          f"retained/call {retained / total:.0f} B")
+    print(f"stats      {weather.get_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    client_parser = subparsers.add_parser("client", help="Per-call vs pooled HTTP client")
+    client_parser.add_argument("--requests", type=int, default=2000)
+    client_parser.add_argument("--concurrency", type=int, default=10)
+
+    tools_parser = subparsers.add_parser("tools", help="Concurrent FastMCP tool calls")
+    tools_parser.add_argument("--calls", type=int, default=2000)
+    tools_parser.add_argument("--concurrency", type=int, default=20)
+    tools_parser.add_argument("--latency", type=float, default=0.0, help="Replay latency (ms)")
+    tools_parser.add_argument("--error-rate", type=float, default=0.0)
+    tools_parser.add_argument("--max-age", type=int, default=None,
+                              help="Cache-Control max-age sent by the replay server")
+    args = parser.parse_args()
+
+    if args.mode == "client":
+        server, base_url = start_replay_server(port=REPLAY_PORT)
+    else:
+        server, base_url = start_replay_server(port=REPLAY_PORT, latency=args.latency / 1000,
+                                               error_rate=args.error_rate, max_age=args.max_age)
+
+    # Point the server at the replay and keep the gridpoint cache out of the real one
+    weather.NWS_API_BASE = base_url
+    weather.gridpoint_cache.path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    try:
+        if args.mode == "client":
+            asyncio.run(bench_client(base_url, args.requests, args.concurrency))
+        else:
+            asyncio.run(bench_tools(args.calls, args.concurrency))
+    finally:
+        server.terminate()
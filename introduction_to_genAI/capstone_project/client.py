@@ -1,15 +1,37 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, NamedTuple
 from contextlib import AsyncExitStack
 from dataclasses import dataclass
+import asyncio
+import os
+import sys
+import time
 
 from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
 
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
+from answer_cache import AnswerCache
+from memory import ConversationMemory
+from metrics import MetricsRegistry, summarize_spans
+from tool_cache import ToolResultCache, canonical_args, is_failure
+
 load_dotenv()
 MODEL = "claude-3-7-sonnet-20250219"
+LLM_TIMEOUT = 60.0
+TOOL_TIMEOUT = 30.0
+MAX_CONCURRENT_TOOLS = 4
+MAX_TOOL_ROUNDS = 5
+MAX_CONTEXT_TOKENS = 8000
+TURN_BUDGET = 90.0
+ANSWER_RESERVE = 15.0
+HEALTH_CHECK_INTERVAL = 15.0
+HEALTH_CHECK_TIMEOUT = 2.0
+CACHE_CONTROL = {"type": "ephemeral"}
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
 
 @dataclass
 class ClientResponse:
@@ -18,10 +40,34 @@ class ClientResponse:
     content: str
     error: Optional[str] = None
     tool_calls: Optional[List[Dict[str, Any]]] = None
+    usage: Optional[Dict[str, int]] = None  # token counts summed over all model calls
+    metrics: Optional[Dict[str, Any]] = None  # timing breakdown and spans (see metrics.summarize_spans)
 
     def __post_init__(self):
         if self.tool_calls is None:
             self.tool_calls = []
+        if self.usage is None:
+            self.usage = {}
+        if self.metrics is None:
+            self.metrics = {}
+
+@dataclass
+class StreamEvent:
+    """Incremental event from WeatherMCPClient.stream_query"""
+    type: str  # "text", "tool_call", "tool_result", "done" or "error"
+    text: str = ""
+    tool: Optional[str] = None
+    args: Optional[Dict[str, Any]] = None
+    response: Optional[ClientResponse] = None
+
+class ToolOutcome(NamedTuple):
+    """Result of one tool_use block"""
+    text: str
+    is_error: bool
+    cached: bool = False  # served from the client-side result cache
+    deduplicated: bool = False  # same call already made earlier in this turn
+    seconds: float = 0.0  # MCP round trip, excluding queue wait
+    queue_wait: float = 0.0  # time waiting for a tool slot
 
 @dataclass
 class ToolInfo:
@@ -31,83 +77,280 @@ class ToolInfo:
     input_schema: Dict[str, Any]
 
 
+def with_cache_breakpoint(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a message with a prompt-cache breakpoint on its last content block"""
+    content = message["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    elif content and isinstance(content[-1], dict):
+        blocks = list(content)
+    else:
+        return message
+    blocks[-1] = {**blocks[-1], "cache_control": CACHE_CONTROL}
+    return {"role": message["role"], "content": blocks}
+
+
+def format_transcript(messages: List[Dict[str, str]]) -> str:
+    """Render user/assistant messages as plain "role: text" lines"""
+    return "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+
+
+async def open_session(exit_stack: AsyncExitStack, server_script_path: str) -> ClientSession:
+    """Open and initialize an MCP session whose transport closes with `exit_stack`
+
+    Args:
+        exit_stack: Stack that owns the transport and session
+        server_script_path: Path to the server script to start over stdio, or
+            the URL of a running shared server (a URL ending in /sse uses SSE)
+    """
+    if server_script_path.startswith(("http://", "https://")):
+        if server_script_path.rstrip("/").endswith("/sse"):
+            transport = sse_client(server_script_path)
+        else:
+            transport = streamablehttp_client(server_script_path)
+        streams = await exit_stack.enter_async_context(transport)
+        read, write = streams[0], streams[1]
+    else:
+        # Use this interpreter directly rather than resolving "python" on PATH, and
+        # pass the whole environment so the server sees its NWS_* settings
+        server_params = StdioServerParameters(
+            command=sys.executable,
+            args=[server_script_path],
+            env=dict(os.environ)
+        )
+        read, write = await exit_stack.enter_async_context(stdio_client(server_params))
+
+    session = await exit_stack.enter_async_context(ClientSession(read, write))
+    await session.initialize()
+    return session
+
+
+class ServerConnection:
+    """One MCP session owned by its own task
+
+    Transports must be closed by the task that opened them, so a background
+    task opens the session and holds it until close() is called. This lets a
+    connection be replaced and closed from any task.
+    """
+
+    def __init__(self, server_script_path: str):
+        self.server_script_path = server_script_path
+        self.session: Optional[ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
+
+    async def start(self) -> ClientSession:
+        """Open the session, raising if the server can't be started or reached"""
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        self.session = await ready
+        return self.session
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            async with AsyncExitStack() as exit_stack:
+                ready.set_result(await open_session(exit_stack, self.server_script_path))
+                await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+
+    async def ping(self, timeout: float = HEALTH_CHECK_TIMEOUT) -> bool:
+        """Whether the server answers a ping in time"""
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except BaseException:
+                pass
+
+
+async def list_tool_infos(session: ClientSession) -> List[ToolInfo]:
+    """Tools offered by an MCP session"""
+    response = await session.list_tools()
+    return [
+        ToolInfo(
+            name=tool.name,
+            description=tool.description or "",
+            input_schema=tool.inputSchema
+        )
+        for tool in response.tools
+    ]
+
+
 class WeatherMCPClient:
     """MCP client interface for weather operations with conversation memory"""
-    def __init__(self, max_context_messages: int = 20):
+    def __init__(self, max_context_messages: Optional[int] = None, max_context_tokens: int = MAX_CONTEXT_TOKENS,
+                 summarize_history: bool = True, llm_timeout: float = LLM_TIMEOUT,
+                 tool_timeout: float = TOOL_TIMEOUT, max_concurrent_tools: int = MAX_CONCURRENT_TOOLS,
+                 max_tool_rounds: int = MAX_TOOL_ROUNDS, turn_budget: float = TURN_BUDGET,
+                 tool_cache: Optional[ToolResultCache] = None, anthropic: Optional[AsyncAnthropic] = None,
+                 metrics: Optional[MetricsRegistry] = None, standby: bool = False,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL,
+                 answer_cache: Optional[AnswerCache] = None):
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
-        self.exit_stack = AsyncExitStack()
-        self.anthropic = Anthropic()
+        # Non-blocking client so model calls never stall the event loop (or the UI);
+        # a client passed in is shared and left open by cleanup()
+        self._owns_anthropic = anthropic is None
+        self.anthropic = anthropic if anthropic is not None else AsyncAnthropic(timeout=llm_timeout)
         self._connected = False
         self._available_tools: List[ToolInfo] = []
 
-        # Conversation memory
-        self.conversation_history: List[Dict[str, str]] = []
-        self.max_context_messages = max_context_messages
+        # Server connection, plus an optional warm standby swapped in when it fails;
+        # a background health check pings the server (0 disables)
+        self._server_path: Optional[str] = None
+        self._connection: Optional[ServerConnection] = None
+        self.standby = standby
+        self._standby_task: Optional[asyncio.Task] = None
+        self.health_check_interval = health_check_interval
+        self._health_monitor: Optional[asyncio.Task] = None
+        self._failover_lock = asyncio.Lock()
+        self._retired: set[asyncio.Task] = set()
+
+        # Reconnect counters
+        self.reconnects = 0
+        self.standby_swaps = 0
+        self.last_recovery_seconds: Optional[float] = None
+
+        # Tool execution limits
+        self.tool_timeout = tool_timeout
+        self.max_concurrent_tools = max_concurrent_tools
+
+        # Agentic loop limits: tool rounds per query and total seconds per query
+        self.max_tool_rounds = max_tool_rounds
+        self.turn_budget = turn_budget
+
+        # Memoized tool results shared across queries (per-tool TTLs, LRU bound)
+        self.tool_cache = tool_cache if tool_cache is not None else ToolResultCache()
+
+        # Optional cache of whole answers to similar standalone questions (may be shared)
+        self.answer_cache = answer_cache
+
+        # Latency and token aggregates over all queries (may be shared)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+
+        # Conversation memory, bounded by tokens; evicted turns are summarized
+        self.memory = ConversationMemory(max_tokens=max_context_tokens, max_messages=max_context_messages)
+        self.summarize_history = summarize_history
+        self._compaction: Optional[asyncio.Task] = None
+        self._compacting: List[Dict[str, str]] = []
 
         # System prompt
         self.system_prompt = ("You are a helpful assistant with access to weather tools. "
                              "You can have conversations, answer questions on any topic, and use weather tools when appropriate. "
                              "Be conversational and remember previous parts of our conversation.")
 
+        # Request payloads, built once (see _build_request_payloads)
+        self._system_payload: List[Dict[str, Any]] = []
+        self._tool_payload: List[Dict[str, Any]] = []
+        self._build_request_payloads()
+
+    def _build_request_payloads(self):
+        """Precompute the system and tool payloads sent with every model call
+
+        The prompt cache covers tools then system, so one breakpoint on the
+        system block caches both. Call again after changing system_prompt.
+        """
+        self._system_payload = [{"type": "text", "text": self.system_prompt, "cache_control": CACHE_CONTROL}]
+        self._tool_payload = [{
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.input_schema
+        } for tool in self._available_tools]
+
     @property
     def is_connected(self) -> bool:
         """Check if client is connected to MCP server"""
         return self._connected and self.session is not None
 
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """Current conversation messages (a copy), oldest first"""
+        return self.memory.messages
+
     def add_to_conversation(self, role: str, content: str):
         """Add a message to conversation history"""
         if role in ["user", "assistant"]:
-            self.conversation_history.append({"role": role, "content": content})
-
-            # Keep only the last N messages to prevent context overflow
-            if len(self.conversation_history) > self.max_context_messages:
-                self.conversation_history = self.conversation_history[-self.max_context_messages:]
+            self.memory.append(role, content)
 
     def clear_conversation(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        if self._compaction:
+            self._compaction.cancel()
+        self.memory.clear()
+
+    async def _compact_memory(self):
+        """Fold messages evicted from memory into the running conversation summary"""
+        pending = self.memory.take_pending()
+        if not pending:
+            return
+
+        # Queries sent while this runs include these messages verbatim
+        self._compacting = pending
+        transcript = format_transcript(pending)
+        prompt = (f"Current summary of the conversation so far:\n{self.memory.summary or '(none)'}\n\n"
+                  f"Older messages to fold into it:\n{transcript}\n\n"
+                  "Write an updated, concise summary that keeps names, places, dates and "
+                  "any facts the user may refer back to. Reply with the summary only.")
+        try:
+            response = await self.anthropic.messages.create(
+                model=MODEL,
+                max_tokens=self.memory.max_summary_tokens,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            self.memory.set_summary("".join(c.text for c in response.content if c.type == 'text'))
+        except Exception:
+            # Keep the previous summary; the evicted messages are simply dropped
+            pass
+        finally:
+            self._compacting = []
+
+    def _schedule_compaction(self):
+        """Summarize evicted messages in the background, off the response path"""
+        if not self.memory.pending_summary:
+            return
+        if not self.summarize_history:
+            self.memory.take_pending()
+            return
+        if self._compaction is None or self._compaction.done():
+            self._compaction = asyncio.create_task(self._compact_memory())
 
     async def connect(self, server_script_path: str = "weather.py") -> ClientResponse:
         """Connect to weather MCP server
 
         Args:
-            server_script_path: Path to the server script
+            server_script_path: Path to the server script to start over stdio, or
+                the URL of a running shared server (e.g. http://127.0.0.1:8000/mcp,
+                or a URL ending in /sse for the SSE transport)
 
         Returns:
             ClientResponse indicating success/failure
         """
         try:
-            server_params = StdioServerParameters(
-                command="python",
-                args=[server_script_path],
-                env=None
-            )
-
-            # Create the transport and session
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
-            self.stdio, self.write = stdio_transport
-            self.session = await self.exit_stack.enter_async_context(
-                ClientSession(self.stdio, self.write)
-            )
+            connection = ServerConnection(server_script_path)
+            self.session = await connection.start()
+            self._connection = connection
+            self._server_path = server_script_path
 
-            await self.session.initialize()
-
-            # Get available tools
-            response = await self.session.list_tools()
-            self._available_tools = [
-                ToolInfo(
-                    name=tool.name,
-                    description=tool.description or "",
-                    input_schema=tool.inputSchema
-                )
-                for tool in response.tools
-            ]
+            # Get available tools (kept across reconnects)
+            self._available_tools = await list_tool_infos(self.session)
 
+            self._build_request_payloads()
             self._connected = True
 
+            if self.standby:
+                self._spawn_standby()
+            if self.health_check_interval > 0:
+                self._health_monitor = asyncio.create_task(self._monitor_health())
+
             tool_names = [tool.name for tool in self._available_tools]
 
             return ClientResponse(
@@ -123,86 +366,373 @@ class WeatherMCPClient:
                 error=f"Failed to connect to server: {str(e)}"
             )
 
+    def _spawn_standby(self):
+        """Start a spare server connection in the background"""
+        async def spawn() -> ServerConnection:
+            connection = ServerConnection(self._server_path)
+            await connection.start()
+            return connection
+        self._standby_task = asyncio.create_task(spawn())
+
+    async def _take_standby(self) -> Optional[ServerConnection]:
+        """The standby connection if it is up and healthy"""
+        task, self._standby_task = self._standby_task, None
+        if task is None:
+            return None
+        try:
+            connection = await task
+        except Exception:
+            return None
+        if await connection.ping():
+            return connection
+        self._retire(connection)
+        return None
+
+    def _retire(self, connection: ServerConnection):
+        """Close a connection in the background"""
+        task = asyncio.create_task(connection.close())
+        self._retired.add(task)
+        task.add_done_callback(self._retired.discard)
+
+    async def health_check(self) -> bool:
+        """Whether the current server connection answers a ping"""
+        return self._connection is not None and await self._connection.ping()
+
+    async def _failover(self, failed: ServerConnection) -> bool:
+        """Replace a failed connection, preferring the warm standby
+
+        The tool list is kept, so no list_tools round trip (and no change to
+        the cached prompt prefix). Returns whether a working connection is
+        in place; if not, the next failure tries again.
+        """
+        async with self._failover_lock:
+            if self._connection is not failed:
+                # Another caller already replaced it
+                return True
+            started = time.perf_counter()
+            replacement = await self._take_standby()
+            if replacement is not None:
+                self.standby_swaps += 1
+            else:
+                replacement = ServerConnection(self._server_path)
+                try:
+                    await replacement.start()
+                except Exception:
+                    return False
+
+            self._connection = replacement
+            self.session = replacement.session
+            self.reconnects += 1
+            self.last_recovery_seconds = time.perf_counter() - started
+            self._retire(failed)
+            if self.standby:
+                self._spawn_standby()
+            return True
+
+    async def _monitor_health(self):
+        """Ping the server periodically, failing over if it stops answering"""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            connection = self._connection
+            if connection is not None and not await connection.ping():
+                await self._failover(connection)
+
+    def connection_stats(self) -> Dict[str, Any]:
+        return {
+            "reconnects": self.reconnects,
+            "standby_swaps": self.standby_swaps,
+            "last_recovery_ms": round(self.last_recovery_seconds * 1000, 1)
+            if self.last_recovery_seconds is not None else None,
+        }
+
+    def bind(self, session: Any, tools: List[ToolInfo], tool_payload: Optional[List[Dict[str, Any]]] = None):
+        """Use an already-connected session instead of connect()
+
+        `session` only needs a `call_tool(name, arguments)` coroutine, so it
+        may be shared (see session_manager.MCPSessionPool). Pass a prebuilt
+        `tool_payload` to share one copy between many clients.
+        """
+        self.session = session
+        self._available_tools = list(tools)
+        self._build_request_payloads()
+        if tool_payload is not None:
+            self._tool_payload = tool_payload
+        self._connected = True
+
+    def fork(self) -> "WeatherMCPClient":
+        """A client for a side query that runs alongside this one's
+
+        It shares the server session, model client and caches, and starts from
+        a copy of the conversation so far. Its exchange is not added back to
+        this client's memory, and it neither summarizes nor fails over.
+        """
+        forked = WeatherMCPClient(
+            max_context_messages=self.memory.max_messages, max_context_tokens=self.memory.max_tokens,
+            summarize_history=False, tool_timeout=self.tool_timeout,
+            max_concurrent_tools=self.max_concurrent_tools, max_tool_rounds=self.max_tool_rounds,
+            turn_budget=self.turn_budget, tool_cache=self.tool_cache, anthropic=self.anthropic,
+            metrics=self.metrics, health_check_interval=0, answer_cache=self.answer_cache,
+        )
+        forked.system_prompt = self.system_prompt
+        forked._system_payload = self._system_payload
+        if self.is_connected:
+            forked.bind(self.session, self._available_tools, self._tool_payload)
+        for message in self.memory.messages:
+            forked.add_to_conversation(message["role"], message["content"])
+        forked.memory.summary = self.memory.summary
+        return forked
+
     async def get_available_tools(self) -> List[ToolInfo]:
         """Get list of tools"""
         return self._available_tools.copy()
 
-    async def process_query(self, query: str) -> ClientResponse:
-        """Process a query using Claude and available tools with conversation context
+    def _budgeted_anthropic(self, remaining: float) -> AsyncAnthropic:
+        """The Anthropic client with its timeout and retries cut to fit in `remaining` seconds"""
+        timeout = self.anthropic.timeout
+        if not isinstance(timeout, (int, float)) or timeout > remaining:
+            timeout = remaining
+        attempts = int(remaining // timeout) if timeout else 1
+        retries = min(self.anthropic.max_retries, max(attempts - 1, 0))
+        return self.anthropic.with_options(timeout=timeout, max_retries=retries)
+
+    async def _call_tool(self, tool_name: str, tool_args: Dict[str, Any],
+                         timeout: Optional[float] = None) -> tuple[str, bool]:
+        """Execute one tool call via MCP, returning (result text, is_error)
+
+        Timeouts and failures are returned as error results rather than raised,
+        so one bad tool call does not fail the others. If the server itself
+        has died, the call is retried once on a replacement connection.
+        `timeout` defaults to `tool_timeout`.
+        """
+        if timeout is None:
+            timeout = self.tool_timeout
+        connection = self._connection
+        while True:
+            try:
+                result = await asyncio.wait_for(
+                    self.session.call_tool(tool_name, tool_args),
+                    timeout=timeout
+                )
+                break
+            except asyncio.TimeoutError:
+                return f"Tool {tool_name} timed out after {timeout:.3g}s", True
+            except Exception as e:
+                if connection is not None and not await connection.ping() and await self._failover(connection):
+                    connection = None
+                    continue
+                return f"Tool {tool_name} failed: {str(e) or type(e).__name__}", True
+
+        result_text = result.content[0].text if result.content else "No result"
+        return result_text, bool(getattr(result, "isError", False))
+
+    async def _run_tools(self, tool_use_blocks: List[Any], turn_results: Dict[str, asyncio.Future],
+                         timeout: Optional[float] = None) -> List[ToolOutcome]:
+        """Run tool_use blocks concurrently (capped), keeping their original order
+
+        Results still fresh in the tool cache are returned without a call.
+        Identical calls (same tool and arguments) within a turn run once:
+        `turn_results` maps each call to its result future and is shared by all
+        rounds of the turn. Failed calls are forgotten so they can be retried.
+        Each call is limited to `timeout` seconds (default `tool_timeout`).
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_tools)
+
+        async def run(block) -> ToolOutcome:
+            cached = self.tool_cache.get(block.name, block.input)
+            if cached is not None:
+                return ToolOutcome(cached, False, cached=True)
+
+            queued = time.perf_counter()
+            async with semaphore:
+                started = time.perf_counter()
+                result_text, is_error = await self._call_tool(block.name, block.input, timeout)
+            if not is_error:
+                self.tool_cache.put(block.name, block.input, result_text)
+            return ToolOutcome(result_text, is_error, seconds=time.perf_counter() - started,
+                               queue_wait=started - queued)
+
+        keys = []
+        deduplicated = []
+        for block in tool_use_blocks:
+            key = f"{block.name}:{canonical_args(block.input)}"
+            deduplicated.append(key in turn_results)
+            if key not in turn_results:
+                turn_results[key] = asyncio.ensure_future(run(block))
+            keys.append(key)
+
+        outcomes = await asyncio.gather(*(turn_results[key] for key in keys))
+        for key, outcome in zip(keys, outcomes):
+            if outcome.is_error:
+                turn_results.pop(key, None)
+        # A repeated call did no work of its own
+        return [outcome._replace(deduplicated=True, seconds=0.0, queue_wait=0.0) if dup else outcome
+                for outcome, dup in zip(outcomes, deduplicated)]
+
+    async def stream_query(self, query: str) -> AsyncIterator[StreamEvent]:
+        """Process a query, yielding text deltas and tool events as they happen
 
         Args:
             query: User query to process
 
-        Returns:
-            ClientResponse with the result
+        Yields:
+            StreamEvents; the last one is "done" or "error" and carries the
+            ClientResponse with the full result
         """
         if not self.is_connected:
-            return ClientResponse(
+            yield StreamEvent("error", response=ClientResponse(
                 success=False,
                 content="",
                 error="Not connected to MCP server"
-            )
-
+            ))
+            return
+
+        started = time.perf_counter()
+        # Only questions opening a conversation are cached or answered from the
+        # cache; later ones ("and tomorrow?") may lean on context
+        standalone = not len(self.memory) and not self.memory.summary
+        cached_answer = None
+        if self.answer_cache is not None and standalone:
+            cached_answer = self.answer_cache.lookup(query)
+        if cached_answer is not None:
+            self.add_to_conversation("user", query)
+            self.add_to_conversation("assistant", cached_answer)
+            self._schedule_compaction()
+            metrics = summarize_spans([], time.perf_counter() - started)
+            metrics["answer_cache_hit"] = True
+            self.metrics.observe_query(True, metrics)
+            yield StreamEvent("text", text=cached_answer)
+            yield StreamEvent("done", response=ClientResponse(
+                success=True,
+                content=cached_answer,
+                metrics=metrics
+            ))
+            return
+
+        turn_results: Dict[str, asyncio.Future] = {}
+        spans: List[Dict[str, Any]] = []
+        usage = dict.fromkeys(USAGE_FIELDS, 0)
         try:
             # Add user message to conversation history
             self.add_to_conversation("user", query)
 
-            # Build messages with conversation context (user/assistant only)
-            messages = self.conversation_history.copy()
-
-            # Prep tools for Claude
-            available_tools = [{
-                "name": tool.name,
-                "description": tool.description,
-                "input_schema": tool.input_schema
-            } for tool in self._available_tools]
-
-            # FIXED: Pass system prompt as separate parameter
-            response = self.anthropic.messages.create(
-                model=MODEL,
-                max_tokens=1000,
-                system=self.system_prompt,
-                messages=messages,
-                tools=available_tools
-            )
+            # Build messages with conversation context (user/assistant only),
+            # caching the earlier history up to the new question
+            messages = self.conversation_history
+            if len(messages) > 1:
+                messages[-2] = with_cache_breakpoint(messages[-2])
+
+            # The summary of evicted turns follows the cached system prompt. Turns
+            # evicted since, whose summary is still being written in the
+            # background, are sent verbatim rather than waited for.
+            system = self._system_payload
+            if self.memory.summary:
+                system = system + [{"type": "text", "text": f"Summary of the earlier conversation:\n{self.memory.summary}"}]
+            unsummarized = self._compacting + self.memory.pending_summary
+            if unsummarized:
+                system = system + [{"type": "text", "text": f"Earlier messages not yet summarized:\n{format_transcript(unsummarized)}"}]
 
             # Process response and handle tool calls
             tool_calls_made = []
             final_text = []
+            # Tool rounds must end early enough to leave time for the final answer
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.turn_budget
+            tools_deadline = deadline - min(ANSWER_RESERVE, self.turn_budget / 3)
+
+            # Let the model chain tool calls until it answers, up to the round and time limits
+            for round_number in range(self.max_tool_rounds + 1):
+                out_of_budget = loop.time() >= tools_deadline
+                final_round = round_number == self.max_tool_rounds or out_of_budget
+
+                request = {
+                    "model": MODEL,
+                    "max_tokens": 1000,
+                    "system": system,
+                    # Later rounds also cache everything up to the latest tool results
+                    "messages": messages[:-1] + [with_cache_breakpoint(messages[-1])] if round_number else messages,
+                    "tools": self._tool_payload,
+                }
+                if final_round:
+                    # Out of rounds or time: answer with the results gathered so far
+                    request["tool_choice"] = {"type": "none"}
+
+                llm_span = {"name": "llm", "round": round_number, "seconds": 0.0, "first_token_seconds": None}
+                spans.append(llm_span)
+                llm_started = time.perf_counter()
+                try:
+                    anthropic = self._budgeted_anthropic(max(deadline - loop.time(), 0.0))
+                    async with anthropic.messages.stream(**request) as stream:
+                        first_delta = True
+                        async for text in stream.text_stream:
+                            # Keep streamed text consistent with the "\n"-joined final content
+                            if first_delta:
+                                llm_span["first_token_seconds"] = time.perf_counter() - llm_started
+                                if final_text:
+                                    yield StreamEvent("text", text="\n")
+                            first_delta = False
+                            yield StreamEvent("text", text=text)
+                        response = await stream.get_final_message()
+                finally:
+                    llm_span["seconds"] = time.perf_counter() - llm_started
+
+                final_text.extend(content.text for content in response.content if content.type == 'text')
+                for field in USAGE_FIELDS:
+                    usage[field] += getattr(response.usage, field, None) or 0
+
+                # Check if there are tool calls to handle
+                tool_use_blocks = [content for content in response.content if content.type == 'tool_use']
+                if not tool_use_blocks or final_round:
+                    break
 
-            # Check if there are tool calls to handle
-            tool_use_blocks = [content for content in response.content if content.type == 'tool_use']
-
-            if tool_use_blocks:
                 # Add the assistant's response with tool calls
                 messages.append({
                     "role": "assistant",
                     "content": response.content
                 })
 
-                # Executetool calls and collect results
+                for content in tool_use_blocks:
+                    yield StreamEvent("tool_call", tool=content.name, args=content.input)
+
+                # Execute tool calls concurrently; results come back in block order
                 tool_results = []
-                for content in response.content:
-                    if content.type == 'tool_use':
-                        tool_name = content.name
-                        tool_args = content.input
-                        tool_id = content.id
-
-                        # Execute tool call via MCP
-                        result = await self.session.call_tool(tool_name, tool_args)
-
-                        tool_calls_made.append({
-                            "tool": tool_name,
-                            "args": tool_args,
-                            "result": result.content[0].text if result.content else "No result"
-                        })
-
-                        # Add tool result
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": tool_id,
-                            "content": result.content[0].text if result.content else "No result"
-                        })
+                tools_started = time.perf_counter()
+                tool_timeout = min(self.tool_timeout, max(tools_deadline - loop.time(), 0.0))
+                outcomes = await self._run_tools(tool_use_blocks, turn_results, tool_timeout)
+                spans.append({"name": "tools", "round": round_number,
+                              "seconds": time.perf_counter() - tools_started})
+                for content, outcome in zip(tool_use_blocks, outcomes):
+                    spans.append({
+                        "name": "tool",
+                        "round": round_number,
+                        "tool": content.name,
+                        "seconds": outcome.seconds,
+                        "queue_wait_seconds": outcome.queue_wait,
+                        "cached": outcome.cached,
+                        "deduplicated": outcome.deduplicated,
+                        "is_error": outcome.is_error,
+                    })
+                    result_text = outcome.text
+                    tool_call = {
+                        "tool": content.name,
+                        "args": content.input,
+                        "result": result_text
+                    }
+                    if outcome.cached:
+                        tool_call["cached"] = True
+                    if outcome.deduplicated:
+                        tool_call["deduplicated"] = True
+                    tool_calls_made.append(tool_call)
+                    yield StreamEvent("tool_result", text=result_text, tool=content.name, args=content.input)
+
+                    # Add tool result
+                    tool_result = {
+                        "type": "tool_result",
+                        "tool_use_id": content.id,
+                        "content": result_text
+                    }
+                    if outcome.is_error:
+                        tool_result["is_error"] = True
+                    tool_results.append(tool_result)
 
                 # Add tool results message
                 messages.append({
@@ -210,52 +740,87 @@ class WeatherMCPClient:
                     "content": tool_results
                 })
 
-                # Get Claude's final response after tool execution
-                final_response = self.anthropic.messages.create(
-                    model=MODEL,
-                    max_tokens=1000,
-                    system=self.system_prompt,  # System prompt here too
-                    messages=messages,
-                )
-
-                # Extract text from final response
-                for content in final_response.content:
-                    if content.type == 'text':
-                        final_text.append(content.text)
-            else:
-                # No tool calls, just extract text
-                for content in response.content:
-                    if content.type == 'text':
-                        final_text.append(content.text)
-
             assistant_response = "\n".join(final_text) if final_text else "No response generated"
 
             # Add assistant response to conversation history
             self.add_to_conversation("assistant", assistant_response)
+            self._schedule_compaction()
 
-            return ClientResponse(
+            # Reuse the answer while the weather data behind it is fresh
+            if self.answer_cache is not None and standalone and final_text and not any(
+                    span.get("is_error") for span in spans) and not any(
+                    is_failure(call["result"]) for call in tool_calls_made):
+                ttls = [self.tool_cache.ttl(call["tool"]) for call in tool_calls_made]
+                self.answer_cache.store(query, assistant_response, min(ttls, default=None))
+
+            result = ClientResponse(
                 success=True,
                 content=assistant_response,
-                tool_calls=tool_calls_made
+                tool_calls=tool_calls_made,
+                usage=usage,
+                metrics=summarize_spans(spans, time.perf_counter() - started)
             )
+            self.metrics.observe_query(True, result.metrics, usage)
+            yield StreamEvent("done", response=result)
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # Drop the unanswered question so history stays user/assistant paired
+            if self.memory.last() == {"role": "user", "content": query}:
+                self.memory.pop_last()
+            raise
 
         except Exception as e:
-            return ClientResponse(
+            result = ClientResponse(
                 success=False,
                 content="",
-                error=f"Error processing query: {str(e)}"
+                error=f"Error processing query: {str(e)}",
+                usage=usage,
+                metrics=summarize_spans(spans, time.perf_counter() - started)
             )
+            self.metrics.observe_query(False, result.metrics, usage)
+            yield StreamEvent("error", response=result)
+
+        finally:
+            # Don't leave tool calls running after a cancelled or failed turn
+            for future in turn_results.values():
+                future.cancel()
+
+    async def process_query(self, query: str) -> ClientResponse:
+        """Process a query using Claude and available tools with conversation context
+
+        Args:
+            query: User query to process
+
+        Returns:
+            ClientResponse with the result
+        """
+        response = None
+        async for event in self.stream_query(query):
+            if event.type in ("done", "error"):
+                response = event.response
+        return response
 
     async def cleanup(self):
         """Clean up resources"""
         try:
-            await self.exit_stack.aclose()
+            if self._health_monitor:
+                self._health_monitor.cancel()
+            standby = await self._take_standby() if self._standby_task else None
+            for connection in (self._connection, standby):
+                if connection is not None:
+                    await connection.close()
+            await asyncio.gather(*self._retired, return_exceptions=True)
         except Exception:
             pass
         finally:
+            self._connection = None
+            self.session = None
             self._connected = False
             self._available_tools = []
-            self.conversation_history = []
+            self._tool_payload = []
+            self.clear_conversation()
+            if self._owns_anthropic:
+                await self.anthropic.close()
 
     async def __aenter__(self):
         """Async context manager entry"""
@@ -0,0 +1,266 @@
+"""Scripted stand-ins for the Anthropic API and the weather MCP server.
+
+The fake model speaks the Messages API (streaming and non-streaming). For
+each question it asks for `tool_rounds` rounds of `tools_per_round` tool
+calls, then streams a text answer. Tool arguments are derived from the
+question, so runs are repeatable. The fake tool server is a FastMCP server
+whose get_alerts and get_forecast tools sleep and return canned text.
+
+Usage:
+    python fake_services.py --model-port 8790 --tools-port 8791
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8790 ANTHROPIC_API_KEY=fake \\
+        WEATHER_SERVER_URL=http://127.0.0.1:8791/mcp python weather_man.py
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import socket
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATES = ["CA", "TX", "FL", "NY", "CO", "WA", "IL", "AZ"]
+LOCATIONS = [
+    (39.7392, -104.9903), (40.7128, -74.0060), (34.0522, -118.2437), (41.8781, -87.6298),
+    (29.7604, -95.3698), (47.6062, -122.3321), (33.4484, -112.0740), (25.7617, -80.1918),
+]
+ANSWER_WORDS = "The forecast calls for clear skies with light winds and mild temperatures through the evening.".split()
+
+
+class FakeModelConfig:
+    """Fake model behaviour (delays in seconds)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8790, tool_rounds: int = 1,
+                 tools_per_round: int = 1, first_token_delay: float = 0.2,
+                 delta_delay: float = 0.01, deltas: int = 12):
+        self.host = host
+        self.port = port
+        self.tool_rounds = tool_rounds
+        self.tools_per_round = tools_per_round
+        self.first_token_delay = first_token_delay
+        self.delta_delay = delta_delay
+        self.deltas = deltas
+        self.base_url = f"http://{host}:{port}"
+
+
+def _is_tool_results(message: dict) -> bool:
+    content = message["content"]
+    return isinstance(content, list) and any(block.get("type") == "tool_result" for block in content)
+
+
+def _text_of(message: dict) -> str:
+    content = message["content"]
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def script_turn(config: FakeModelConfig, body: dict) -> list[dict]:
+    """Content blocks the model answers with for a request body"""
+    # Tool rounds already done for the newest question
+    rounds_done = 0
+    question = ""
+    for message in reversed(body["messages"]):
+        if message["role"] != "user":
+            continue
+        if not _is_tool_results(message):
+            question = _text_of(message)
+            break
+        rounds_done += 1
+
+    words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(max(config.deltas, 1))]
+    tool_choice = body.get("tool_choice", {}).get("type")
+    if not body.get("tools") or tool_choice == "none" or rounds_done >= config.tool_rounds:
+        return [{"type": "text", "text": " ".join(words)}]
+
+    seed = zlib.crc32(question.encode())
+    blocks = [{"type": "text", "text": "Let me check."}]
+    for k in range(config.tools_per_round):
+        pick = (seed + rounds_done * config.tools_per_round + k) % len(STATES)
+        if k % 2 == 0:
+            blocks.append({"type": "tool_use", "id": f"toolu_{rounds_done}_{k}",
+                           "name": "get_alerts", "input": {"state": STATES[pick]}})
+        else:
+            latitude, longitude = LOCATIONS[pick]
+            blocks.append({"type": "tool_use", "id": f"toolu_{rounds_done}_{k}",
+                           "name": "get_forecast", "input": {"latitude": latitude, "longitude": longitude}})
+    return blocks
+
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages from the script, streaming when asked to"""
+    protocol_version = "HTTP/1.1"
+    config: FakeModelConfig
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.loads(raw)
+        blocks = script_turn(self.config, body)
+        usage = {"input_tokens": len(raw) // 4, "output_tokens": sum(len(json.dumps(b)) for b in blocks) // 4,
+                 "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        stop_reason = "tool_use" if blocks[-1]["type"] == "tool_use" else "end_turn"
+        message = {"id": "msg_fake", "type": "message", "role": "assistant", "model": body["model"],
+                   "stop_reason": stop_reason, "stop_sequence": None}
+
+        time.sleep(self.config.first_token_delay)
+        if not body.get("stream"):
+            self._send_json({**message, "content": blocks, "usage": usage})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._event("message_start", {"type": "message_start", "message": {
+            **message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1}}})
+        for index, block in enumerate(blocks):
+            if block["type"] == "text":
+                self._event("content_block_start", {"type": "content_block_start", "index": index,
+                                                    "content_block": {"type": "text", "text": ""}})
+                words = block["text"].split(" ")
+                for i, word in enumerate(words):
+                    if i:
+                        time.sleep(self.config.delta_delay)
+                    text = word if i == len(words) - 1 else word + " "
+                    self._event("content_block_delta", {"type": "content_block_delta", "index": index,
+                                                        "delta": {"type": "text_delta", "text": text}})
+            else:
+                self._event("content_block_start", {"type": "content_block_start", "index": index,
+                                                    "content_block": {**block, "input": {}}})
+                self._event("content_block_delta", {"type": "content_block_delta", "index": index, "delta": {
+                    "type": "input_json_delta", "partial_json": json.dumps(block["input"])}})
+            self._event("content_block_stop", {"type": "content_block_stop", "index": index})
+        self._event("message_delta", {"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]},
+                                      "delta": {"stop_reason": stop_reason, "stop_sequence": None}})
+        self._event("message_stop", {"type": "message_stop"})
+        self._chunk(b"")
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _event(self, name: str, data: dict):
+        self._chunk(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+
+    def _send_json(self, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_model(config: FakeModelConfig, ready=None):
+    """Serve the fake model until the process is interrupted, setting `ready` once listening"""
+    handler = type("ConfiguredFakeModelHandler", (FakeModelHandler,), {"config": config})
+    server = ThreadingHTTPServer((config.host, config.port), handler, bind_and_activate=False)
+    # Accept bursts of concurrent conversations without refusing connections
+    server.request_queue_size = 1024
+    server.daemon_threads = True
+    server.server_bind()
+    server.server_activate()
+    if ready is not None:
+        ready.set()
+    server.serve_forever()
+
+
+def serve_tools(host: str = "127.0.0.1", port: int = 8791, delay: float = 0.05, result_size: int = 1000,
+                ready=None):
+    """Serve fake weather tools over streamable HTTP until interrupted, setting `ready` once listening"""
+    import uvicorn
+    from mcp.server.fastmcp import FastMCP
+
+    mcp = FastMCP("fake-weather", host=host, port=port, log_level="WARNING")
+    filler = ("Light winds. " * (result_size // 13 + 1))[:result_size]
+
+    @mcp.tool()
+    async def get_alerts(state: str) -> str:
+        """Get weather alerts for a US state."""
+        await asyncio.sleep(delay)
+        return f"Alerts for {state}: {filler}"
+
+    @mcp.tool()
+    async def get_forecast(latitude: float, longitude: float) -> str:
+        """Get weather forecast for a location."""
+        await asyncio.sleep(delay)
+        return f"Forecast for {latitude},{longitude}: {filler}"
+
+    # Bind before serving so a taken port fails here rather than going unnoticed
+    sock = socket.create_server((host, port))
+    if ready is not None:
+        ready.set()
+    server = uvicorn.Server(uvicorn.Config(mcp.streamable_http_app(), log_level="warning"))
+    asyncio.run(server.serve(sockets=[sock]))
+
+
+def _wait_until_ready(process: multiprocessing.Process, ready, name: str, host: str, port: int):
+    """Wait until this process (not whatever else is on the port) is listening"""
+    for _ in range(100):
+        if ready.wait(timeout=0.1):
+            return
+        if not process.is_alive():
+            break
+    process.terminate()
+    raise RuntimeError(f"{name} failed to start on {host}:{port} (port in use?)")
+
+
+def start_fake_model(**kwargs) -> tuple[multiprocessing.Process, str]:
+    """Run the fake model in a background process.
+
+    Accepts the FakeModelConfig arguments and returns the process and its
+    base URL (for ANTHROPIC_BASE_URL); terminate the process when done.
+    Raises RuntimeError if the server can't listen.
+    """
+    config = FakeModelConfig(**kwargs)
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve_model, args=(config, ready), daemon=True)
+    process.start()
+    _wait_until_ready(process, ready, "Fake model", config.host, config.port)
+    return process, config.base_url
+
+
+def start_fake_tools(host: str = "127.0.0.1", port: int = 8791, delay: float = 0.05,
+                     result_size: int = 1000) -> tuple[multiprocessing.Process, str]:
+    """Run the fake tool server in a background process; returns it and its MCP URL
+
+    Raises RuntimeError if the server can't listen.
+    """
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve_tools, args=(host, port, delay, result_size, ready),
+                                      daemon=True)
+    process.start()
+    _wait_until_ready(process, ready, "Fake tool server", host, port)
+    return process, f"http://{host}:{port}/mcp"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--model-port", type=int, default=8790)
+    parser.add_argument("--tools-port", type=int, default=8791)
+    parser.add_argument("--tool-rounds", type=int, default=1, help="Tool rounds before each answer")
+    parser.add_argument("--tools-per-round", type=int, default=1)
+    parser.add_argument("--first-token", type=float, default=200, help="Model delay before streaming (ms)")
+    parser.add_argument("--delta-delay", type=float, default=10, help="Delay between text deltas (ms)")
+    parser.add_argument("--deltas", type=int, default=12, help="Text deltas per answer")
+    parser.add_argument("--tool-delay", type=float, default=50, help="Tool latency (ms)")
+    parser.add_argument("--result-size", type=int, default=1000, help="Characters per tool result")
+    args = parser.parse_args()
+
+    model, model_url = start_fake_model(host=args.host, port=args.model_port, tool_rounds=args.tool_rounds,
+                                        tools_per_round=args.tools_per_round,
+                                        first_token_delay=args.first_token / 1000,
+                                        delta_delay=args.delta_delay / 1000, deltas=args.deltas)
+    print(f"Fake model on {model_url}")
+    print(f"Fake tools on http://{args.host}:{args.tools_port}/mcp")
+    try:
+        serve_tools(args.host, args.tools_port, args.tool_delay / 1000, args.result_size)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        model.terminate()
@@ -0,0 +1,120 @@
+from typing import Optional, List, Dict, Deque
+from collections import deque
+from dataclasses import dataclass
+
+# Rough token estimate (about 4 characters per token plus per-message framing);
+# close enough for budgeting without a tokenizer round trip
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@dataclass
+class MemoryEntry:
+    """A conversation message with its estimated token count"""
+    role: str
+    content: str
+    tokens: int
+
+
+class ConversationMemory:
+    """Token-budgeted conversation history
+
+    Messages are kept in a deque with a running token total, so appending and
+    evicting are O(1). When the budget (or the optional message cap) is
+    exceeded, the oldest user/assistant turns are evicted and handed to
+    `pending_summary`, which the owner can fold into `summary` with a model
+    call (see WeatherMCPClient) so old context is compacted rather than lost.
+    """
+
+    def __init__(self, max_tokens: int = 8000, max_messages: Optional[int] = None,
+                 max_summary_tokens: int = 500):
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.max_summary_tokens = max_summary_tokens
+        self._entries: Deque[MemoryEntry] = deque()
+        self.total_tokens = 0
+
+        # Evicted messages waiting to be summarized, and the running summary
+        self.pending_summary: List[Dict[str, str]] = []
+        self.summary = ""
+
+        # Counters
+        self.evicted_messages = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """Messages in API format, oldest first"""
+        return [{"role": entry.role, "content": entry.content} for entry in self._entries]
+
+    def append(self, role: str, content: str):
+        """Add a message and evict old turns if over budget"""
+        tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        self._entries.append(MemoryEntry(role, content, tokens))
+        self.total_tokens += tokens
+        self._evict()
+
+    def pop_last(self) -> Optional[Dict[str, str]]:
+        """Remove and return the newest message"""
+        if not self._entries:
+            return None
+        entry = self._entries.pop()
+        self.total_tokens -= entry.tokens
+        return {"role": entry.role, "content": entry.content}
+
+    def last(self) -> Optional[Dict[str, str]]:
+        if not self._entries:
+            return None
+        entry = self._entries[-1]
+        return {"role": entry.role, "content": entry.content}
+
+    def _over_budget(self) -> bool:
+        if self.max_messages is not None and len(self._entries) > self.max_messages:
+            return True
+        return self.total_tokens > self.max_tokens
+
+    def _evict(self):
+        # Always keep the newest message, even if it alone exceeds the budget
+        while len(self._entries) > 1 and self._over_budget():
+            self._evict_oldest()
+
+        # History sent to the model must start with a user message
+        while len(self._entries) > 1 and self._entries[0].role != "user":
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        entry = self._entries.popleft()
+        self.total_tokens -= entry.tokens
+        self.evicted_messages += 1
+        self.pending_summary.append({"role": entry.role, "content": entry.content})
+
+    def take_pending(self) -> List[Dict[str, str]]:
+        """Hand over evicted messages for summarization"""
+        pending, self.pending_summary = self.pending_summary, []
+        return pending
+
+    def set_summary(self, summary: str):
+        """Replace the running summary, truncated to its token budget"""
+        max_chars = self.max_summary_tokens * CHARS_PER_TOKEN
+        self.summary = summary[:max_chars]
+
+    def clear(self):
+        self._entries.clear()
+        self.total_tokens = 0
+        self.pending_summary = []
+        self.summary = ""
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages": len(self._entries),
+            "tokens": self.total_tokens,
+            "evicted_messages": self.evicted_messages,
+            "summary_tokens": estimate_tokens(self.summary) if self.summary else 0,
+        }
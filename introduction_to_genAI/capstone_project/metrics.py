@@ -0,0 +1,180 @@
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from bisect import bisect_left
+import json
+import time
+
+# Latency buckets in seconds, from fast tool cache hits to full model turns
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "weatherman"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def summarize_spans(spans: List[Dict[str, Any]], total_seconds: float) -> Dict[str, Any]:
+    """Per-query timing breakdown attached to ClientResponse.metrics
+
+    Tool calls in one round run concurrently, so tool time is the wall time
+    of each round ("tools" spans), not the sum of the individual calls.
+    """
+    def total(name: str, key: str = "seconds") -> float:
+        return sum(span.get(key, 0.0) for span in spans if span["name"] == name)
+
+    tool_spans = [span for span in spans if span["name"] == "tool"]
+    return {
+        "total_seconds": total_seconds,
+        "llm_seconds": total("llm"),
+        "tool_seconds": total("tools"),
+        "queue_wait_seconds": total("tool", "queue_wait_seconds") + total("queue_wait"),
+        "llm_calls": sum(1 for span in spans if span["name"] == "llm"),
+        "tool_calls": len(tool_spans),
+        "tool_cache_hits": sum(1 for span in tool_spans if span.get("cached")),
+        "spans": spans,
+    }
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative only when exported)"""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            result.append(("+Inf" if bound == float("inf") else f"{bound:g}", running))
+        return result
+
+
+class MetricsRegistry:
+    """Aggregates per-query metrics from ClientResponses
+
+    Histograms: query, LLM call, time to first token, tool call and queue
+    wait latency. Counters: queries by status, tokens by type and tool calls
+    by result. Export with to_prometheus() or as JSON lines with
+    to_json_line() / write_jsonl().
+    """
+
+    HISTOGRAMS = {
+        "query_seconds": "Query processing latency, excluding the wait behind a user's earlier query",
+        "llm_seconds": "Latency of each model call",
+        "llm_first_token_seconds": "Time to the first streamed text of each model call",
+        "tool_seconds": "Latency of each MCP tool call",
+        "queue_wait_seconds": "Time spent waiting for a tool slot or a user's earlier query",
+    }
+    COUNTERS = {
+        "queries_total": "Queries processed",
+        "tokens_total": "Model tokens used",
+        "tool_calls_total": "Tool calls by result",
+        "answer_cache_hits_total": "Queries answered from the answer cache",
+    }
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe_query(self, success: bool, metrics: Dict[str, Any], usage: Optional[Dict[str, int]] = None):
+        """Record one query's breakdown (see summarize_spans) and token usage"""
+        status = "success" if success else "error"
+        self.inc("queries_total", status=status)
+        self.observe("query_seconds", metrics.get("total_seconds", 0.0), status=status)
+        if metrics.get("answer_cache_hit"):
+            self.inc("answer_cache_hits_total")
+
+        for span in metrics.get("spans", []):
+            if span["name"] == "llm":
+                self.observe("llm_seconds", span["seconds"])
+                if span.get("first_token_seconds") is not None:
+                    self.observe("llm_first_token_seconds", span["first_token_seconds"])
+            elif span["name"] == "tool":
+                if span.get("cached"):
+                    result = "cached"
+                elif span.get("deduplicated"):
+                    result = "deduplicated"
+                else:
+                    result = "error" if span.get("is_error") else "ok"
+                    self.observe("tool_seconds", span["seconds"], tool=span["tool"])
+                    self.observe("queue_wait_seconds", span.get("queue_wait_seconds", 0.0), queue="tools")
+                self.inc("tool_calls_total", tool=span["tool"], result=result)
+
+        for field, count in (usage or {}).items():
+            if count:
+                self.inc("tokens_total", count, type=field.removesuffix("_tokens"))
+
+    def to_prometheus(self) -> str:
+        """Aggregates in the Prometheus text exposition format"""
+        def label_text(labels: Labels, extra: Labels = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+        lines = []
+        for name, help_text in self.HISTOGRAMS.items():
+            series = sorted((labels, h) for (n, labels), h in self.histograms.items() if n == name)
+            if not series:
+                continue
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for labels, histogram in series:
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{metric}_bucket{label_text(labels, (('le', bound),))} {count}")
+                lines.append(f"{metric}_sum{label_text(labels)} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{label_text(labels)} {histogram.count}")
+
+        for name, help_text in self.COUNTERS.items():
+            series = sorted((labels, v) for (n, labels), v in self.counters.items() if n == name)
+            if not series:
+                continue
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            lines += [f"{metric}{label_text(labels)} {value}" for labels, value in series]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregates as plain data: counters, and count/sum/mean/buckets per histogram"""
+        histograms = [{
+            "name": name,
+            "labels": dict(labels),
+            "count": histogram.count,
+            "sum": round(histogram.sum, 6),
+            "mean": round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+            "buckets": dict(histogram.cumulative()),
+        } for (name, labels), histogram in self.histograms.items()]
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self.counters.items()]
+        return {"timestamp": time.time(), "histograms": histograms, "counters": counters}
+
+    def to_json_line(self) -> str:
+        return json.dumps(self.snapshot(), separators=(",", ":"))
+
+    def write_jsonl(self, path: str):
+        """Append the current aggregates to a JSON lines file"""
+        with open(path, "a") as f:
+            f.write(self.to_json_line() + "\n")
+
+    def clear(self):
+        self.histograms.clear()
+        self.counters.clear()
@@ -0,0 +1,271 @@
+"""Caches used by the weather MCP server"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any
+import sqlite3
+import time
+
+
+class GridpointCache:
+    """Maps (latitude, longitude) to the NWS forecast URL for that point.
+
+    Two layers: an in-memory LRU in front of a SQLite table, so the mapping
+    survives server restarts. Both layers are bounded and evict the least
+    recently used entries.
+    """
+
+    def __init__(self, path: str, max_memory_entries: int = 512,
+                 max_disk_entries: int = 10000, precision: int = 4):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.precision = precision
+        self._memory: OrderedDict[tuple[float, float], str] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, latitude: float, longitude: float) -> tuple[float, float]:
+        """Normalize coordinates so nearby requests share an entry"""
+        return (round(latitude, self.precision), round(longitude, self.precision))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the SQLite database on first use"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS gridpoints ("
+                " latitude REAL NOT NULL,"
+                " longitude REAL NOT NULL,"
+                " forecast_url TEXT NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (latitude, longitude))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS gridpoints_last_used ON gridpoints (last_used)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key: tuple[float, float], forecast_url: str):
+        """Insert into the memory layer, evicting the oldest entry if full"""
+        self._memory[key] = forecast_url
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, latitude: float, longitude: float) -> str | None:
+        """Look up a forecast URL, or None if the point is not cached"""
+        key = self.key(latitude, longitude)
+
+        forecast_url = self._memory.get(key)
+        if forecast_url is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return forecast_url
+
+        try:
+            db = self._connection()
+            row = db.execute(
+                "SELECT forecast_url FROM gridpoints WHERE latitude = ? AND longitude = ?",
+                key
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE gridpoints SET last_used = ? WHERE latitude = ? AND longitude = ?",
+                    (time.time(), *key)
+                )
+                db.commit()
+        except sqlite3.Error:
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._remember(key, row[0])
+        return row[0]
+
+    def put(self, latitude: float, longitude: float, forecast_url: str):
+        """Store the forecast URL for a point in both layers"""
+        key = self.key(latitude, longitude)
+        self._remember(key, forecast_url)
+
+        try:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO gridpoints VALUES (?, ?, ?, ?)",
+                (*key, forecast_url, time.time())
+            )
+            # Trim the table back to its bound, dropping least recently used rows
+            cursor = db.execute(
+                "DELETE FROM gridpoints WHERE rowid IN ("
+                " SELECT rowid FROM gridpoints ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+            db.commit()
+        except sqlite3.Error:
+            pass
+
+    def invalidate(self, latitude: float, longitude: float):
+        """Drop a point from both layers (e.g. when its forecast URL stops working)"""
+        key = self.key(latitude, longitude)
+        self._memory.pop(key, None)
+        try:
+            db = self._connection()
+            db.execute("DELETE FROM gridpoints WHERE latitude = ? AND longitude = ?", key)
+            db.commit()
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> dict[str, int]:
+        """Hit/miss counters and current sizes"""
+        try:
+            disk_entries = self._connection().execute(
+                "SELECT COUNT(*) FROM gridpoints"
+            ).fetchone()[0]
+        except sqlite3.Error:
+            disk_entries = 0
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries,
+        }
+
+    def close(self):
+        """Close the SQLite connection (the memory layer is kept)"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+@dataclass
+class CachedResponse:
+    """A decoded response body with its HTTP validators"""
+    data: Any
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def freshness_lifetime(headers) -> float | None:
+    """Seconds a response may be served from cache, or None if it must not be stored.
+
+    Follows Cache-Control (no-store, no-cache, max-age, s-maxage) and Age,
+    falling back to Expires.
+    """
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+
+    age = 0.0
+    try:
+        age = float(headers.get("age", 0))
+    except ValueError:
+        pass
+
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(0.0, float(directives[name]) - age)
+            except ValueError:
+                break
+
+    expires = headers.get("expires")
+    if expires:
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+class ResponseCache:
+    """Bounded LRU of decoded NWS responses keyed by URL.
+
+    Fresh entries are served without a request; stale entries keep their
+    ETag / Last-Modified so they can be revalidated with a conditional GET.
+    Cached bodies are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+        # Counters
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, url: str) -> CachedResponse | None:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def store(self, url: str, data: Any, headers) -> None:
+        """Cache a 200 response body according to its headers"""
+        lifetime = freshness_lifetime(headers)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if lifetime is None or (lifetime == 0 and not etag and not last_modified):
+            # Not storable, or stale immediately with no way to revalidate
+            self._entries.pop(url, None)
+            return
+
+        self._entries[url] = CachedResponse(data, time.time() + lifetime, etag, last_modified)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def refresh(self, url: str, entry: CachedResponse, headers) -> None:
+        """Extend an entry's freshness after a 304 Not Modified"""
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None:
+            self._entries.pop(url, None)
+            return
+        entry.expires_at = time.time() + lifetime
+        entry.etag = headers.get("etag", entry.etag)
+        entry.last_modified = headers.get("last-modified", entry.last_modified)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
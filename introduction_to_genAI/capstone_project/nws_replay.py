@@ -0,0 +1,170 @@
+"""Local stand-in for api.weather.gov that replays recorded fixtures.
+
+Serves /points/{lat},{lon}, /gridpoints/.../forecast and
+/alerts/active/area/{state} from JSON files in a fixtures directory, with
+optional latency and error injection.
+
+Usage:
+    python nws_replay.py --port 8765 --latency 50 --error-rate 0.02
+    NWS_API_BASE=http://127.0.0.1:8765 python weather.py
+
+    # Refresh the fixtures from the live API
+    python nws_replay.py --record --latitude 39.7456 --longitude -97.0892 --state CA
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LIVE_API_BASE = "https://api.weather.gov"
+
+
+class ReplayConfig:
+    """Replay behaviour shared by all request handlers (latency and jitter in seconds)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, fixtures_dir: str = FIXTURES_DIR,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 max_age: int | None = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_age = max_age
+        self.base_url = f"http://{host}:{port}"
+
+        # Load fixtures once; the points fixture is pointed back at this server
+        bodies = {}
+        for name in ("points", "forecast", "alerts"):
+            with open(os.path.join(fixtures_dir, f"{name}.json")) as f:
+                bodies[name] = json.load(f)
+        bodies["points"]["properties"]["forecast"] = f"{self.base_url}/gridpoints/TOP/32,81/forecast"
+        self.bodies = {name: json.dumps(body).encode() for name, body in bodies.items()}
+
+    def route(self, path: str) -> bytes | None:
+        """Fixture body for a request path, or None if it is not an NWS route"""
+        if path.startswith("/points/"):
+            return self.bodies["points"]
+        if path.startswith("/gridpoints/") and path.endswith("/forecast"):
+            return self.bodies["forecast"]
+        if path.startswith("/alerts/active/area/"):
+            return self.bodies["alerts"]
+        return None
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves fixture bodies over keep-alive HTTP/1.1"""
+    protocol_version = "HTTP/1.1"
+    config: ReplayConfig
+
+    def do_GET(self):
+        config = self.config
+        delay = config.latency + random.uniform(0, config.jitter)
+        if delay:
+            time.sleep(delay)
+
+        if random.random() < config.error_rate:
+            self._send(503, b'{"title": "Service Unavailable"}')
+            return
+
+        body = config.route(self.path.split("?", 1)[0])
+        if body is None:
+            self._send(404, b'{"title": "Not Found"}')
+        else:
+            self._send(200, body)
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/geo+json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200 and self.config.max_age is not None:
+            self.send_header("Cache-Control", f"public, max-age={self.config.max_age}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(config: ReplayConfig, ready=None):
+    """Serve until the process is interrupted, setting `ready` once listening"""
+    handler = type("ConfiguredReplayHandler", (ReplayHandler,), {"config": config})
+    server = ThreadingHTTPServer((config.host, config.port), handler)
+    if ready is not None:
+        ready.set()
+    server.serve_forever()
+
+
+def start_replay_server(**kwargs) -> tuple[multiprocessing.Process, str]:
+    """Run the replay server in a background process.
+
+    Accepts the ReplayConfig arguments and returns the process and its base
+    URL; terminate the process when done. Raises RuntimeError if the server
+    can't listen (e.g. the port is taken by another server, which would
+    otherwise be benchmarked instead).
+    """
+    config = ReplayConfig(**kwargs)
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve, args=(config, ready), daemon=True)
+    process.start()
+
+    # Wait until this process (not whatever else is on the port) is listening
+    for _ in range(50):
+        if ready.wait(timeout=0.1):
+            return process, config.base_url
+        if not process.is_alive():
+            break
+    process.terminate()
+    raise RuntimeError(f"Replay server failed to start on {config.host}:{config.port} (port in use?)")
+
+
+def record(latitude: float, longitude: float, state: str, fixtures_dir: str):
+    """Save live NWS responses as fixtures"""
+    def fetch(url: str) -> dict:
+        request = Request(url, headers={"User-Agent": "weather-app/1.0", "Accept": "application/geo+json"})
+        with urlopen(request, timeout=30) as response:
+            return json.load(response)
+
+    points = fetch(f"{LIVE_API_BASE}/points/{latitude},{longitude}")
+    fixtures = {
+        "points": points,
+        "forecast": fetch(points["properties"]["forecast"]),
+        "alerts": fetch(f"{LIVE_API_BASE}/alerts/active/area/{state.upper()}"),
+    }
+    for name, body in fixtures.items():
+        with open(os.path.join(fixtures_dir, f"{name}.json"), "w") as f:
+            json.dump(body, f, indent=2)
+            f.write("\n")
+        print(f"Recorded {name}.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of fixture JSON files")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency up to this (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--max-age", type=int, default=None, help="Send Cache-Control max-age (seconds)")
+    parser.add_argument("--record", action="store_true", help="Record fixtures from the live API and exit")
+    parser.add_argument("--latitude", type=float, default=39.7456)
+    parser.add_argument("--longitude", type=float, default=-97.0892)
+    parser.add_argument("--state", default="CA")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.latitude, args.longitude, args.state, args.fixtures)
+    else:
+        config = ReplayConfig(args.host, args.port, args.fixtures, args.latency / 1000,
+                              args.jitter / 1000, args.error_rate, args.max_age)
+        print(f"Replaying NWS fixtures on {config.base_url}")
+        try:
+            serve(config)
+        except KeyboardInterrupt:
+            pass
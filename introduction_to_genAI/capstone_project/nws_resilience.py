@@ -0,0 +1,212 @@
+"""Retries, hedged requests and circuit breaking for NWS calls"""
+from typing import Any
+import asyncio
+import random
+import time
+
+import httpx
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after consecutive failures, then fails fast.
+
+    After `reset_timeout` seconds the breaker goes half-open and lets a
+    single trial request through; its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """End a trial that finished without an outcome (e.g. cancelled) so
+        another can be sent; a no-op once record_* has run"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_in_flight:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class ResilientFetcher:
+    """Sends GET requests with jittered retries, hedging and a breaker per host.
+
+    Args:
+        retries: Extra attempts after a transport error or retryable status
+        backoff_base: First backoff in seconds; doubles each attempt (full jitter)
+        backoff_max: Upper bound for a single backoff, including Retry-After
+        hedge_after: Seconds before a duplicate request is raced against a
+            slow one (0 disables hedging)
+        failure_threshold: Consecutive failures that open a host's breaker
+        reset_timeout: Seconds an open breaker waits before a trial request
+        deadline: Seconds a get() may take in total, across attempts, hedges
+            and backoff (0 disables)
+        min_attempt: A retry is only started if at least this many seconds
+            remain before the deadline
+    """
+
+    def __init__(self, retries: int = 2, backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 hedge_after: float = 2.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, deadline: float = 15.0, min_attempt: float = 0.5):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.deadline = deadline
+        self.min_attempt = min_attempt
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+        # Counters
+        self.requests = 0
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+        self.deadline_exceeded = 0
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _hedged_get(self, client: httpx.AsyncClient, url: str,
+                          headers: dict[str, str]) -> httpx.Response:
+        """GET, racing a second identical request if the first is slow"""
+        first = asyncio.ensure_future(client.get(url, headers=headers))
+        if not self.hedge_after:
+            return await first
+
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            if not done:
+                self.hedged += 1
+                pending.add(asyncio.ensure_future(client.get(url, headers=headers)))
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get(self, client: httpx.AsyncClient, url: str,
+                  headers: dict[str, str] | None = None) -> httpx.Response:
+        """GET a URL, retrying transient failures.
+
+        Raises CircuitOpenError if the host's breaker is open, or the last
+        error once retries or the deadline are exhausted (TimeoutError if the
+        deadline cut an attempt short). A retryable status on the final
+        attempt is returned for the caller to handle.
+        """
+        breaker = self.breaker(httpx.URL(url).host)
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline if self.deadline else None
+
+        for attempt in range(self.retries + 1):
+            trial = breaker.state == "half_open"
+            if not breaker.allow():
+                self.short_circuited += 1
+                raise CircuitOpenError(f"Circuit open for {httpx.URL(url).host}")
+
+            response = None
+            error: Exception | None = None
+            try:
+                remaining = deadline - loop.time() if deadline is not None else None
+                response = await asyncio.wait_for(self._hedged_get(client, url, headers or {}), remaining)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.deadline_exceeded += 1
+                if attempt == self.retries:
+                    raise
+                error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if attempt == self.retries:
+                    return response
+            finally:
+                # Cancellation or an unexpected error must not leave the trial pending
+                if trial:
+                    breaker.release_trial()
+
+            backoff = self._backoff(attempt, response)
+            if deadline is not None and loop.time() + backoff + self.min_attempt > deadline:
+                # No time for another attempt: give up with this one's outcome
+                if error is not None:
+                    raise error
+                return response
+            self.retried += 1
+            await asyncio.sleep(backoff)
+
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "short_circuited": self.short_circuited,
+            "deadline_exceeded": self.deadline_exceeded,
+            "breakers": {
+                host: {"state": b.state, "failures": b.failures, "times_opened": b.times_opened}
+                for host, b in self.breakers.items()
+            },
+        }
@@ -0,0 +1,112 @@
+"""Incremental JSON reading for large NWS payloads"""
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+import json
+import re
+
+_WHITESPACE = re.compile(r"\s*")
+_decoder = json.JSONDecoder()
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+
+class _StreamBuffer:
+    """Text buffer over an async stream of chunks, read left to right"""
+
+    def __init__(self, chunks: AsyncIterable[str]):
+        self._chunks = chunks.__aiter__()
+        self._text = ""
+        self._pos = 0
+        self._eof = False
+
+    async def _fill(self) -> bool:
+        """Append the next chunk, dropping consumed text. False at end of stream."""
+        if self._eof:
+            return False
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            return False
+        self._text = self._text[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    async def _skip_whitespace(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._text, self._pos).end()
+            if self._pos < len(self._text):
+                return
+            if not await self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    async def next_char(self) -> str:
+        """Consume and return the next non-whitespace character"""
+        await self._skip_whitespace()
+        char = self._text[self._pos]
+        self._pos += 1
+        return char
+
+    async def peek(self) -> str:
+        await self._skip_whitespace()
+        return self._text[self._pos]
+
+    async def value(self) -> Any:
+        """Decode one complete JSON value, reading more chunks as needed"""
+        await self._skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._text, self._pos)
+            except json.JSONDecodeError:
+                if not await self._fill():
+                    raise
+                continue
+            # A number cut off by the chunk boundary ("12" of "125", "2." of "2.5")
+            # decodes to a prefix; wait for the character that ends it
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if end == len(self._text) or self._text[end] in _NUMBER_CHARS:
+                    if await self._fill():
+                        continue
+                    if end < len(self._text):
+                        raise ValueError("Malformed number in JSON stream")
+            self._pos = end
+            return value
+
+
+async def iter_json_array(chunks: AsyncIterable[str], key: str) -> AsyncIterator[Any]:
+    """Yield the items of a top-level object's array member one at a time.
+
+    Only the item currently being decoded is held in memory. Other members
+    are decoded and discarded, and reading stops once the array ends, so the
+    caller can also stop early by closing the generator.
+    """
+    buffer = _StreamBuffer(chunks)
+    if await buffer.next_char() != "{":
+        raise ValueError("Expected a JSON object")
+    if await buffer.peek() == "}":
+        return
+
+    while True:
+        name = await buffer.value()
+        if await buffer.next_char() != ":":
+            raise ValueError("Expected ':' after object key")
+
+        if name == key:
+            if await buffer.next_char() != "[":
+                raise ValueError(f"Expected '{key}' to be an array")
+            if await buffer.peek() == "]":
+                return
+            while True:
+                yield await buffer.value()
+                separator = await buffer.next_char()
+                if separator == "]":
+                    return
+                if separator != ",":
+                    raise ValueError("Expected ',' or ']' in array")
+        else:
+            await buffer.value()
+
+        separator = await buffer.next_char()
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError("Expected ',' or '}' in object")
@@ -0,0 +1,244 @@
+from typing import Optional, List, Dict, Any, AsyncIterator
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+import asyncio
+import time
+
+from mcp import ClientSession
+from anthropic import AsyncAnthropic
+
+from client import (WeatherMCPClient, ClientResponse, StreamEvent, ToolInfo, LLM_TIMEOUT,
+                    open_session, list_tool_infos)
+from metrics import MetricsRegistry
+from tool_cache import ToolResultCache
+
+POOL_SIZE = 4
+MAX_USERS = 1000
+
+
+@dataclass
+class PooledSession:
+    """One MCP server connection in the pool, with its load counters"""
+    session: ClientSession
+    in_flight: int = 0
+    calls: int = 0
+
+
+class MCPSessionPool:
+    """Fixed-size pool of MCP sessions with least-loaded routing
+
+    Exposes the `call_tool` coroutine of a ClientSession, so it can stand in
+    for one (see WeatherMCPClient.bind). Each call goes to the session with
+    the fewest calls in flight; ties rotate so idle sessions share the work.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self.exit_stack = AsyncExitStack()
+        self.sessions: List[PooledSession] = []
+        self.tools: List[ToolInfo] = []
+        self._next = 0
+
+    async def connect(self, server_script_path: str = "weather.py"):
+        """Open `size` sessions to a server script (one subprocess each) or URL"""
+        # Transports must be opened and closed by the same task, so connect in turn
+        for _ in range(self.size):
+            session = await open_session(self.exit_stack, server_script_path)
+            self.sessions.append(PooledSession(session))
+        self.tools = await list_tool_infos(self.sessions[0].session)
+
+    def _least_loaded(self) -> PooledSession:
+        count = len(self.sessions)
+        start, self._next = self._next, (self._next + 1) % count
+        order = [self.sessions[(start + i) % count] for i in range(count)]
+        return min(order, key=lambda pooled: pooled.in_flight)
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        if not self.sessions:
+            raise RuntimeError("Session pool is not connected")
+        pooled = self._least_loaded()
+        pooled.in_flight += 1
+        pooled.calls += 1
+        try:
+            return await pooled.session.call_tool(name, arguments)
+        finally:
+            pooled.in_flight -= 1
+
+    async def close(self):
+        try:
+            await self.exit_stack.aclose()
+        finally:
+            self.sessions = []
+            self.tools = []
+
+    def stats(self) -> List[Dict[str, int]]:
+        return [{"in_flight": pooled.in_flight, "calls": pooled.calls} for pooled in self.sessions]
+
+
+@dataclass
+class UserSession:
+    """Conversation state for one user; queries from the same user run in turn"""
+    client: WeatherMCPClient
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_active: float = field(default_factory=time.monotonic)
+
+
+class SessionManager:
+    """Serves many users from one pool of MCP sessions
+
+    Every user gets a lightweight WeatherMCPClient holding only their
+    conversation memory; the MCP sessions, the Anthropic client, the tool
+    payload, the tool result cache and the metrics registry are shared. Idle users beyond
+    `max_users` are dropped, least recently active first.
+
+    Args:
+        pool_size: MCP server connections to open
+        max_users: Conversations kept before the least recently active is dropped
+        **client_options: WeatherMCPClient arguments used for every user
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE, max_users: int = MAX_USERS,
+                 llm_timeout: float = LLM_TIMEOUT, tool_cache: Optional[ToolResultCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, **client_options):
+        self.pool = MCPSessionPool(pool_size)
+        self.max_users = max_users
+        self.anthropic = AsyncAnthropic(timeout=llm_timeout)
+        self.tool_cache = tool_cache if tool_cache is not None else ToolResultCache()
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.client_options = client_options
+        self.users: OrderedDict[str, UserSession] = OrderedDict()
+        self._tool_payload: List[Dict[str, Any]] = []
+
+        # Counters
+        self.evicted_users = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return bool(self.pool.sessions)
+
+    async def connect(self, server_script_path: str = "weather.py") -> ClientResponse:
+        """Open the session pool
+
+        Args:
+            server_script_path: Server script to start `pool_size` times over
+                stdio, or the URL of a running shared server
+
+        Returns:
+            ClientResponse indicating success/failure
+        """
+        try:
+            await self.pool.connect(server_script_path)
+        except Exception as e:
+            await self.pool.close()
+            return ClientResponse(
+                success=False,
+                content="",
+                error=f"Failed to connect to server: {str(e)}"
+            )
+
+        self._tool_payload = [{
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.input_schema
+        } for tool in self.pool.tools]
+        for user in self.users.values():
+            user.client.bind(self.pool, self.pool.tools, self._tool_payload)
+
+        tool_names = [tool.name for tool in self.pool.tools]
+        return ClientResponse(
+            success=True,
+            content=(f"Connected {len(self.pool.sessions)} sessions. "
+                     f"Available tools: {', '.join(tool_names)}")
+        )
+
+    def _user(self, user_id: str) -> UserSession:
+        """Get or create a user's session, marking it most recently active"""
+        user = self.users.get(user_id)
+        if user is None:
+            client = WeatherMCPClient(tool_cache=self.tool_cache, anthropic=self.anthropic,
+                                      metrics=self.metrics, **self.client_options)
+            if self.is_connected:
+                client.bind(self.pool, self.pool.tools, self._tool_payload)
+            self._evict_idle(self.max_users - 1)
+            user = self.users[user_id] = UserSession(client)
+        self.users.move_to_end(user_id)
+        user.last_active = time.monotonic()
+        return user
+
+    def _evict_idle(self, keep: int):
+        # Never drop a user whose query is still running
+        for user_id in list(self.users):
+            if len(self.users) <= keep:
+                break
+            if not self.users[user_id].lock.locked():
+                self.users.pop(user_id).client.clear_conversation()
+                self.evicted_users += 1
+
+    def client_for(self, user_id: str) -> WeatherMCPClient:
+        """The user's client, e.g. to read or clear their conversation"""
+        return self._user(user_id).client
+
+    def _record_queue_wait(self, response: ClientResponse, seconds: float):
+        """Add the wait behind the user's earlier queries to a response's metrics"""
+        self.metrics.observe("queue_wait_seconds", seconds, queue="user")
+        if response.metrics:
+            response.metrics["spans"].append({"name": "queue_wait", "queue": "user", "seconds": seconds})
+            response.metrics["queue_wait_seconds"] += seconds
+            response.metrics["total_seconds"] += seconds
+
+    async def stream_query(self, user_id: str, query: str) -> AsyncIterator[StreamEvent]:
+        """Stream a query in a user's conversation (see WeatherMCPClient.stream_query)"""
+        user = self._user(user_id)
+        queued = time.perf_counter()
+        async with user.lock:
+            waited = time.perf_counter() - queued
+            async for event in user.client.stream_query(query):
+                if event.response is not None:
+                    self._record_queue_wait(event.response, waited)
+                yield event
+        user.last_active = time.monotonic()
+        self._evict_idle(self.max_users)
+
+    async def process_query(self, user_id: str, query: str) -> ClientResponse:
+        """Process a query in a user's conversation"""
+        user = self._user(user_id)
+        queued = time.perf_counter()
+        async with user.lock:
+            waited = time.perf_counter() - queued
+            response = await user.client.process_query(query)
+        self._record_queue_wait(response, waited)
+        user.last_active = time.monotonic()
+        self._evict_idle(self.max_users)
+        return response
+
+    def end_session(self, user_id: str):
+        """Forget a user's conversation"""
+        user = self.users.pop(user_id, None)
+        if user is not None:
+            user.client.clear_conversation()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self.users),
+            "evicted_users": self.evicted_users,
+            "sessions": self.pool.stats(),
+            "tool_cache": self.tool_cache.stats(),
+        }
+
+    async def cleanup(self):
+        """Close the pool and the shared Anthropic client"""
+        for user_id in list(self.users):
+            self.end_session(user_id)
+        try:
+            await self.pool.close()
+        except Exception:
+            pass
+        finally:
+            await self.anthropic.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.cleanup()
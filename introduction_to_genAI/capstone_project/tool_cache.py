@@ -0,0 +1,96 @@
+from typing import Optional, Dict, Any, Iterable
+from collections import OrderedDict
+import json
+import time
+
+# Weather data changes slowly; alerts and change feeds need to stay current
+DEFAULT_TOOL_TTLS = {
+    "get_forecast": 600.0,
+    "get_forecasts": 600.0,
+    "get_alerts": 60.0,
+    "get_alerts_for_states": 60.0,
+}
+# Tools whose results depend on server-side state between calls
+DEFAULT_UNCACHED_TOOLS = {"get_alert_changes"}
+# The weather tools report NWS failures as ordinary text (batch tools per
+# item), so results containing these are never cached
+FAILURE_MARKERS = ("Unable to fetch", "\nError: ")
+
+
+def is_failure(result: str) -> bool:
+    """Whether a tool result reports a (possibly temporary) upstream failure"""
+    return any(marker in result for marker in FAILURE_MARKERS)
+
+
+def canonical_args(args: Dict[str, Any]) -> str:
+    """Stable key for tool arguments: sorted keys, floats rounded to 4 places"""
+    def normalize(value):
+        if isinstance(value, float):
+            return round(value, 4)
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        return value
+    return json.dumps(normalize(args), sort_keys=True)
+
+
+class ToolResultCache:
+    """TTL + LRU memo of MCP tool results, keyed by tool name and arguments"""
+
+    def __init__(self, max_entries: int = 256, default_ttl: float = 120.0,
+                 ttls: Optional[Dict[str, float]] = None,
+                 uncached_tools: Optional[Iterable[str]] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        self.uncached_tools = set(DEFAULT_UNCACHED_TOOLS if uncached_tools is None else uncached_tools)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl(self, tool_name: str) -> float:
+        """Seconds a result of this tool stays fresh (0 if never cached)"""
+        if tool_name in self.uncached_tools:
+            return 0.0
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def get(self, tool_name: str, args: Dict[str, Any]) -> Optional[str]:
+        """Cached result text, or None if missing, expired or not cacheable"""
+        if self.ttl(tool_name) <= 0:
+            return None
+        key = f"{tool_name}:{canonical_args(args)}"
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, tool_name: str, args: Dict[str, Any], result: str):
+        ttl = self.ttl(tool_name)
+        if ttl <= 0 or is_failure(result):
+            return
+        key = f"{tool_name}:{canonical_args(args)}"
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
@@ -1,34 +1,241 @@
-from typing import Any
+from typing import Any, TypedDict
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing, asynccontextmanager
+import asyncio
+import json
+import os
+import time
 import httpx
 import logging
 from mcp.server.fastmcp import FastMCP
 
+from nws_cache import GridpointCache, ResponseCache
+from nws_resilience import RETRYABLE_STATUS, ResilientFetcher
+from nws_stream import iter_json_array
+
 # Suppress ALL logging to prevent any output that might interfere with the UI
 logging.basicConfig(level=logging.CRITICAL)
 logging.getLogger().setLevel(logging.CRITICAL)
 for logger_name in ['httpx', 'httpcore', 'mcp', 'fastmcp']:
     logging.getLogger(logger_name).setLevel(logging.CRITICAL)
 
-# Initialize FastMCP server
-mcp = FastMCP("weather")
-
 # Constants
-NWS_API_BASE = "https://api.weather.gov"
+NWS_API_BASE = os.getenv("NWS_API_BASE", "https://api.weather.gov")
 USER_AGENT = "weather-app/1.0"
 
+# Per-attempt timeout; slow attempts are hedged and retried instead of waited on
+NWS_TIMEOUT = float(os.getenv("NWS_TIMEOUT", "10"))
+
+# Connection pool tuning (overridable through the environment)
+NWS_MAX_CONNECTIONS = int(os.getenv("NWS_MAX_CONNECTIONS", "20"))
+NWS_MAX_KEEPALIVE = int(os.getenv("NWS_MAX_KEEPALIVE", "10"))
+NWS_KEEPALIVE_EXPIRY = float(os.getenv("NWS_KEEPALIVE_EXPIRY", "30"))
+NWS_HTTP2 = os.getenv("NWS_HTTP2", "0") == "1"
+
+# Retries, hedging and circuit breaking for upstream calls
+NWS_RETRIES = int(os.getenv("NWS_RETRIES", "2"))
+NWS_HEDGE_AFTER = float(os.getenv("NWS_HEDGE_AFTER", "2.0"))
+NWS_DEADLINE = float(os.getenv("NWS_DEADLINE", "15"))
+NWS_BREAKER_THRESHOLD = int(os.getenv("NWS_BREAKER_THRESHOLD", "5"))
+NWS_BREAKER_RESET = float(os.getenv("NWS_BREAKER_RESET", "30"))
+
+nws_fetcher = ResilientFetcher(
+    retries=NWS_RETRIES,
+    hedge_after=NWS_HEDGE_AFTER,
+    deadline=NWS_DEADLINE,
+    failure_threshold=NWS_BREAKER_THRESHOLD,
+    reset_timeout=NWS_BREAKER_RESET,
+)
+
+# Batch tools
+NWS_BATCH_CONCURRENCY = int(os.getenv("NWS_BATCH_CONCURRENCY", "8"))
+MAX_BATCH_SIZE = 25
+
+# Background alert polling (disabled unless NWS_POLL_STATES is set, e.g. "CA,TX")
+NWS_POLL_STATES = [s.strip().upper() for s in os.getenv("NWS_POLL_STATES", "").split(",") if s.strip()]
+NWS_POLL_INTERVAL = float(os.getenv("NWS_POLL_INTERVAL", "60"))
+
+# Gridpoint cache: (lat, lon) -> forecast URL, persisted across restarts
+NWS_CACHE_PATH = os.getenv(
+    "NWS_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "nws_cache.sqlite3")
+)
+NWS_GRIDPOINT_MEMORY_ENTRIES = int(os.getenv("NWS_GRIDPOINT_MEMORY_ENTRIES", "512"))
+NWS_GRIDPOINT_DISK_ENTRIES = int(os.getenv("NWS_GRIDPOINT_DISK_ENTRIES", "10000"))
+# Forecast URL statuses meaning the saved grid mapping is no longer valid
+GRID_GONE_STATUS = {404, 410}
+
+gridpoint_cache = GridpointCache(
+    NWS_CACHE_PATH,
+    max_memory_entries=NWS_GRIDPOINT_MEMORY_ENTRIES,
+    max_disk_entries=NWS_GRIDPOINT_DISK_ENTRIES,
+)
+
+# HTTP response cache honouring Cache-Control / Expires / ETag / Last-Modified
+NWS_RESPONSE_CACHE_ENTRIES = int(os.getenv("NWS_RESPONSE_CACHE_ENTRIES", "256"))
+response_cache = ResponseCache(max_entries=NWS_RESPONSE_CACHE_ENTRIES)
+
+# Shared client and alert poller, owned by the server lifespan
+_http_client: httpx.AsyncClient | None = None
+_http_client_users = 0
+_alert_poller: asyncio.Task | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create an NWS client with keep-alive and bounded connection limits."""
+    http2 = NWS_HTTP2
+    if http2:
+        # HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 without it
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            http2 = False
+
+    return httpx.AsyncClient(
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/geo+json"
+        },
+        timeout=NWS_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=NWS_MAX_CONNECTIONS,
+            max_keepalive_connections=NWS_MAX_KEEPALIVE,
+            keepalive_expiry=NWS_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+    )
+
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Open the shared NWS client (and alert poller) and close them on shutdown.
+
+    Resources are reference counted so transports that run one lifespan per
+    session all share the same connection pool and poller.
+    """
+    global _http_client, _http_client_users, _alert_poller
+    if _http_client is None:
+        _http_client = create_http_client()
+    if _alert_poller is None and NWS_POLL_STATES:
+        _alert_poller = asyncio.create_task(poll_alerts(NWS_POLL_STATES, NWS_POLL_INTERVAL))
+    _http_client_users += 1
+    try:
+        yield
+    finally:
+        _http_client_users -= 1
+        if _http_client_users == 0:
+            if _alert_poller is not None:
+                poller, _alert_poller = _alert_poller, None
+                poller.cancel()
+                try:
+                    await poller
+                except asyncio.CancelledError:
+                    pass
+            if _http_client is not None:
+                client, _http_client = _http_client, None
+                await client.aclose()
+            gridpoint_cache.close()
+
+
+# Initialize FastMCP server
+mcp = FastMCP("weather", lifespan=server_lifespan)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight task.
+
+    The first caller starts the work; later callers with the same key await
+    the same task and receive its result. The task is shielded so a
+    cancelled caller does not cancel it for everyone else.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._in_flight),
+        }
+
+
+nws_requests = SingleFlight()
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for coalescing (case-folded host, sorted query)."""
+    parsed = httpx.URL(url.strip())
+    query = sorted(parsed.params.multi_items())
+    return str(parsed.copy_with(params=query or None, fragment=None))
+
+
+async def _fetch_json(client: httpx.AsyncClient, url: str) -> tuple[dict[str, Any] | None, int | None]:
+    """GET a URL through the response cache, returning (data, status).
+
+    Data is None on any failure; status is that of the last response, or
+    None if there was none (transport error, open breaker, cache hit).
+
+    Fresh cache entries are returned without a request. Stale ones are
+    revalidated, and a 304 reuses the cached body without downloading or
+    parsing it again.
+    """
+    cached = response_cache.get(url)
+    if cached is not None and cached.is_fresh:
+        response_cache.fresh_hits += 1
+        return cached.data, None
+
+    status = None
+    try:
+        headers = cached.validators() if cached is not None else {}
+        response = await nws_fetcher.get(client, url, headers)
+        status = response.status_code
+
+        if response.status_code == 304 and cached is not None:
+            response_cache.revalidated += 1
+            response_cache.refresh(url, cached, response.headers)
+            return cached.data, status
+
+        response.raise_for_status()
+        data = response.json()
+        response_cache.misses += 1
+        response_cache.store(url, data, response.headers)
+        return data, status
+    except Exception:
+        return None, status
+
+async def _request(url: str) -> tuple[dict[str, Any] | None, int | None]:
+    if _http_client is None:
+        # Outside the server lifespan (e.g. scripts), use a one-off client
+        async with create_http_client() as client:
+            return await _fetch_json(client, url)
+    return await _fetch_json(_http_client, url)
+
+async def fetch_nws(url: str) -> tuple[dict[str, Any] | None, int | None]:
+    """Request the NWS API, returning the data (None on failure) and HTTP status.
+
+    Concurrent requests for the same URL share a single upstream call.
+    """
+    return await nws_requests.run(normalize_url(url), lambda: _request(url))
+
 async def make_nws_request(url: str) -> dict[str, Any] | None:
     """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+    data, _ = await fetch_nws(url)
+    return data
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
@@ -41,14 +248,210 @@ Description: {props.get('description', 'No description available')}
 Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
+def format_period(period: dict) -> str:
+    """Format a forecast period into a readable string."""
+    return f"""
+{period['name']}:
+Temperature: {period['temperature']}°{period['temperatureUnit']}
+Wind: {period['windSpeed']} {period['windDirection']}
+Forecast: {period['detailedForecast']}
+"""
+
+def alert_matches(feature: dict, severity: str | None = None, event: str | None = None,
+                  urgency: str | None = None) -> bool:
+    """Check an alert feature against optional severity/event/urgency filters."""
+    props = feature.get("properties", {})
+    if severity and props.get("severity", "").lower() != severity.lower():
+        return False
+    if urgency and props.get("urgency", "").lower() != urgency.lower():
+        return False
+    if event and event.lower() not in props.get("event", "").lower():
+        return False
+    return True
+
+async def _stream_features(client: httpx.AsyncClient, url: str, severity: str | None,
+                           event: str | None, urgency: str | None,
+                           limit: int | None) -> list[dict] | None:
+    breaker = nws_fetcher.breaker(httpx.URL(url).host)
+    trial = breaker.state == "half_open"
+    if not breaker.allow():
+        nws_fetcher.short_circuited += 1
+        return None
+    try:
+        async with client.stream("GET", url) as response:
+            if response.status_code in RETRYABLE_STATUS:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            response.raise_for_status()
+            matched = []
+            async with aclosing(iter_json_array(response.aiter_text(), "features")) as features:
+                async for feature in features:
+                    if alert_matches(feature, severity, event, urgency):
+                        matched.append(feature)
+                        if limit and len(matched) >= limit:
+                            break
+            return matched
+    except httpx.TransportError:
+        breaker.record_failure()
+        return None
+    except Exception:
+        return None
+    finally:
+        # Cancellation or a decoding error must not leave the trial pending
+        if trial:
+            breaker.release_trial()
+
+async def fetch_alert_features(url: str, severity: str | None = None, event: str | None = None,
+                               urgency: str | None = None,
+                               limit: int | None = None) -> list[dict] | None:
+    """Fetch alert features matching the filters, parsing the feed incrementally.
+
+    Features are filtered as they are decoded and reading stops once `limit`
+    matches are found, so a large feed is never held in memory at once. A
+    fresh response-cache entry for the same URL is used instead when present.
+    """
+    cached = response_cache.get(url)
+    if cached is not None and cached.is_fresh:
+        response_cache.fresh_hits += 1
+        matched = [f for f in cached.data.get("features", [])
+                   if alert_matches(f, severity, event, urgency)]
+        return matched[:limit] if limit else matched
+
+    async def stream() -> list[dict] | None:
+        if _http_client is None:
+            async with create_http_client() as client:
+                return await _stream_features(client, url, severity, event, urgency, limit)
+        return await _stream_features(_http_client, url, severity, event, urgency, limit)
+
+    key = f"{normalize_url(url)}#{severity}|{event}|{urgency}|{limit}".lower()
+    return await nws_requests.run(key, stream)
+
+class AlertIndex:
+    """Active alerts per state keyed by NWS alert id, kept up to date by polling.
+
+    Each poll is diffed against the previous one and the added / updated /
+    expired alerts are appended to a bounded change log, numbered so callers
+    can ask for everything after a change they have already seen.
+    """
+
+    def __init__(self, max_changes: int = 1000):
+        self._alerts: dict[str, dict[str, dict]] = {}
+        self._polled_at: dict[str, float] = {}
+        self.changes: deque[dict[str, Any]] = deque(maxlen=max_changes)
+        self.last_change = 0
+
+    def features(self, state: str, max_age: float) -> list[dict] | None:
+        """Indexed alerts for a state, or None if it is not polled or is stale"""
+        polled_at = self._polled_at.get(state)
+        if polled_at is None or time.time() - polled_at > max_age:
+            return None
+        return list(self._alerts[state].values())
+
+    def update(self, state: str, features: list[dict]) -> dict[str, int]:
+        """Replace a state's alerts with a fresh poll and record the differences"""
+        previous = self._alerts.get(state, {})
+        current = {feature["id"]: feature for feature in features if "id" in feature}
+        counts = {"added": 0, "updated": 0, "expired": 0}
+
+        for alert_id, feature in current.items():
+            old = previous.get(alert_id)
+            if old is None:
+                self._record(state, "added", feature)
+                counts["added"] += 1
+            elif old.get("properties") != feature.get("properties"):
+                self._record(state, "updated", feature)
+                counts["updated"] += 1
+        for alert_id, feature in previous.items():
+            if alert_id not in current:
+                self._record(state, "expired", feature)
+                counts["expired"] += 1
+
+        self._alerts[state] = current
+        self._polled_at[state] = time.time()
+        return counts
+
+    def _record(self, state: str, change: str, feature: dict):
+        self.last_change += 1
+        self.changes.append({
+            "number": self.last_change,
+            "state": state,
+            "change": change,
+            "feature": feature,
+        })
+
+    def changes_since(self, number: int, state: str | None = None) -> list[dict[str, Any]]:
+        return [c for c in self.changes
+                if c["number"] > number and (state is None or c["state"] == state)]
+
+    def has_gap(self, number: int) -> bool:
+        """Whether changes after `number` are no longer all in the log"""
+        if number > self.last_change:
+            # Numbered by an earlier run of the server
+            return True
+        return bool(self.changes) and number < self.changes[0]["number"] - 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "states": sorted(self._alerts),
+            "alerts": sum(len(alerts) for alerts in self._alerts.values()),
+            "last_change": self.last_change,
+        }
+
+
+alert_index = AlertIndex()
+
+
+async def poll_alerts(states: list[str], interval: float):
+    """Refresh the alert index for the given states every `interval` seconds."""
+    async def poll_state(state: str):
+        data = await make_nws_request(f"{NWS_API_BASE}/alerts/active/area/{state}")
+        if data and "features" in data:
+            alert_index.update(state, data["features"])
+
+    while True:
+        await asyncio.gather(*(poll_state(state) for state in states), return_exceptions=True)
+        await asyncio.sleep(interval)
+
 @mcp.tool()
-async def get_alerts(state: str) -> str:
+async def get_alerts(state: str, severity: str | None = None, event: str | None = None,
+                     urgency: str | None = None, limit: int | None = None) -> str:
     """Get weather alerts for a US state.
 
     Args:
         state: Two-letter US state code (e.g. CA, NY)
+        severity: Only alerts of this severity (Extreme, Severe, Moderate, Minor)
+        event: Only alerts whose event name contains this text (e.g. Flood)
+        urgency: Only alerts of this urgency (Immediate, Expected, Future)
+        limit: Maximum number of alerts to return
     """
+    state = state.strip().upper()
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
+
+    # Polled states are answered from the in-memory index
+    indexed = alert_index.features(state, max_age=2 * NWS_POLL_INTERVAL)
+    if indexed is not None:
+        features = [f for f in indexed if alert_matches(f, severity, event, urgency)]
+        if not features:
+            return "No active alerts for this state."
+        alerts = [format_alert(feature) for feature in features[:limit or None]]
+        # The whole list is in memory, so only note the cut when alerts were left out
+        if limit and len(features) > limit:
+            alerts.append(f"\nShowing the first {limit} matching alerts.")
+        return "\n---\n".join(alerts)
+
+    if severity or event or urgency or limit:
+        features = await fetch_alert_features(url, severity, event, urgency, limit)
+        if features is None:
+            return "Unable to fetch alerts or no alerts found."
+        if not features:
+            return "No active alerts matching these filters."
+
+        alerts = [format_alert(feature) for feature in features]
+        if limit and len(features) >= limit:
+            alerts.append(f"\nShowing the first {limit} matching alerts.")
+        return "\n---\n".join(alerts)
+
     data = await make_nws_request(url)
 
     if not data or "features" not in data:
@@ -60,6 +463,18 @@ async def get_alerts(state: str) -> str:
     alerts = [format_alert(feature) for feature in data["features"]]
     return "\n---\n".join(alerts)
 
+async def resolve_forecast_url(latitude: float, longitude: float) -> str | None:
+    """Look up the forecast grid endpoint for a point and cache it."""
+    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
+    points_data = await make_nws_request(points_url)
+
+    if not points_data:
+        return None
+
+    forecast_url = points_data["properties"]["forecast"]
+    gridpoint_cache.put(latitude, longitude, forecast_url)
+    return forecast_url
+
 @mcp.tool()
 async def get_forecast(latitude: float, longitude: float) -> str:
     """Get weather forecast for a location.
@@ -68,34 +483,148 @@ async def get_forecast(latitude: float, longitude: float) -> str:
         latitude: Latitude of the location
         longitude: Longitude of the location
     """
-    # First get the forecast grid endpoint
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    # A cached grid endpoint saves the /points round trip
+    forecast_url = gridpoint_cache.get(latitude, longitude)
+    if forecast_url:
+        forecast_data, status = await fetch_nws(forecast_url)
+        if status in GRID_GONE_STATUS:
+            # The grid moved; forget it and resolve the point again below.
+            # Other failures (timeouts, 5xx, open breaker) keep the saved mapping.
+            gridpoint_cache.invalidate(latitude, longitude)
+            forecast_url = None
 
-    if not points_data:
-        return "Unable to fetch forecast data for this location."
+    if not forecast_url:
+        forecast_url = await resolve_forecast_url(latitude, longitude)
+        if not forecast_url:
+            return "Unable to fetch forecast data for this location."
 
-    # Get the forecast URL from the points response
-    forecast_url = points_data["properties"]["forecast"]
-    forecast_data = await make_nws_request(forecast_url)
+        forecast_data = await make_nws_request(forecast_url)
 
     if not forecast_data:
         return "Unable to fetch detailed forecast."
 
     # Format the periods into a readable forecast
     periods = forecast_data["properties"]["periods"]
-    forecasts = []
-    for period in periods[:5]:  # Only show next 5 periods
-        forecast = f"""
-{period['name']}:
-Temperature: {period['temperature']}°{period['temperatureUnit']}
-Wind: {period['windSpeed']} {period['windDirection']}
-Forecast: {period['detailedForecast']}
-"""
-        forecasts.append(forecast)
-
+    forecasts = [format_period(period) for period in periods[:5]]  # Only show next 5 periods
     return "\n---\n".join(forecasts)
 
+class Location(TypedDict):
+    latitude: float
+    longitude: float
+
+async def run_batch(labels: list[str], calls: list[Awaitable[str]]) -> str:
+    """Run tool calls concurrently (bounded) and combine their results.
+
+    Each item is reported under its own heading; a failure in one item is
+    reported in place and does not affect the others.
+    """
+    semaphore = asyncio.Semaphore(NWS_BATCH_CONCURRENCY)
+
+    async def bounded(call: Awaitable[str]) -> str:
+        async with semaphore:
+            try:
+                return await call
+            except Exception as e:
+                return f"Error: {str(e)}"
+
+    results = await asyncio.gather(*(bounded(call) for call in calls))
+    return "\n\n".join(
+        f"=== {label} ===\n{result.strip()}" for label, result in zip(labels, results)
+    )
+
+@mcp.tool()
+async def get_alerts_for_states(states: list[str], severity: str | None = None,
+                                event: str | None = None, urgency: str | None = None,
+                                limit: int | None = None) -> str:
+    """Get weather alerts for several US states in one call.
+
+    Args:
+        states: Two-letter US state codes (e.g. ["CA", "NY"]), at most 25
+        severity: Only alerts of this severity (Extreme, Severe, Moderate, Minor)
+        event: Only alerts whose event name contains this text (e.g. Flood)
+        urgency: Only alerts of this urgency (Immediate, Expected, Future)
+        limit: Maximum number of alerts to return per state
+    """
+    if not states:
+        return "No states given."
+    if len(states) > MAX_BATCH_SIZE:
+        return f"Too many states; at most {MAX_BATCH_SIZE} per call."
+
+    labels = [state.strip().upper() for state in states]
+    calls = [get_alerts(state, severity, event, urgency, limit) for state in labels]
+    return await run_batch(labels, calls)
+
+@mcp.tool()
+async def get_forecasts(locations: list[Location]) -> str:
+    """Get weather forecasts for several locations in one call.
+
+    Args:
+        locations: Objects with latitude and longitude, at most 25
+    """
+    if not locations:
+        return "No locations given."
+    if len(locations) > MAX_BATCH_SIZE:
+        return f"Too many locations; at most {MAX_BATCH_SIZE} per call."
+
+    labels = [f"{loc['latitude']}, {loc['longitude']}" for loc in locations]
+    calls = [get_forecast(loc["latitude"], loc["longitude"]) for loc in locations]
+    return await run_batch(labels, calls)
+
+@mcp.tool()
+async def get_alert_changes(since: int = 0, state: str | None = None) -> str:
+    """Get alerts added, updated or expired since an earlier call.
+
+    Only available for states the server polls in the background.
+
+    Args:
+        since: Change number from a previous call (0 on the first call)
+        state: Optional two-letter US state code to restrict the changes to
+    """
+    if not NWS_POLL_STATES:
+        return "Alert change tracking is not enabled on this server."
+
+    state = state.strip().upper() if state else None
+    if state and state not in NWS_POLL_STATES:
+        return f"{state} is not tracked. Tracked states: {', '.join(NWS_POLL_STATES)}"
+
+    if alert_index.has_gap(since):
+        return (f"Changes after {since} are no longer tracked. Fetch the full list with get_alerts, "
+                f"then ask for changes since {alert_index.last_change}.")
+
+    changes = alert_index.changes_since(since, state)
+    if not changes:
+        return f"No alert changes since change {since}. Latest change: {alert_index.last_change}"
+
+    sections = [f"[{c['change'].upper()} in {c['state']}]{format_alert(c['feature'])}" for c in changes]
+    sections.append(f"\nLatest change: {alert_index.last_change}")
+    return "\n---\n".join(sections)
+
+@mcp.resource("weather://stats")
+def get_stats() -> str:
+    """Cache, coalescing and upstream health counters for the weather server."""
+    return json.dumps({
+        "gridpoint_cache": gridpoint_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "coalescing": nws_requests.stats(),
+        "alert_index": alert_index.stats(),
+        "upstream": nws_fetcher.stats(),
+    })
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Weather MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "streamable-http", "sse"],
+        default=os.getenv("WEATHER_TRANSPORT", "stdio"),
+        help="stdio for a per-client subprocess, or a network transport shared by many clients"
+    )
+    parser.add_argument("--host", default=os.getenv("WEATHER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("WEATHER_PORT", "8000")))
+    args = parser.parse_args()
+
     # Initialize and run the server
-    mcp.run(transport='stdio')
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.run(transport=args.transport)
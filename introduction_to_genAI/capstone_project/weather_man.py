@@ -8,13 +8,49 @@ from textual.widgets import (
     Input,
     Static,
 )
+from textual.content import Content
 from textual.message import Message
+from textual.timer import Timer
 import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Deque, List, Optional, Set
 
 from client import WeatherMCPClient
 
+# Bubbles mounted at once, and how many are recycled per scroll step
+WINDOW_SIZE = 40
+PAGE_SIZE = 10
+# Streamed text is drawn at most this many times a second, and scrolling only
+# animates when nothing was drawn for SCROLL_ANIMATION_GAP seconds
+FRAME_RATE = 30
+SCROLL_ANIMATION_GAP = 0.5
+# Questions that may wait behind the ones being answered
+MAX_QUEUED_QUERIES = 10
+
+
+@dataclass(slots=True)
+class ChatMessage:
+    """A message in the chat log, kept whether or not it has a bubble"""
+    content: str
+    is_user: bool
+    timestamp: str
+    loading: bool = False
+    status: str = ""  # dim line from the app itself, e.g. "Using get_alerts..."
+
+
+@dataclass
+class PendingQuery:
+    """A submitted question, its response bubble and the task answering it"""
+    query: str
+    response: int
+    task: Optional[asyncio.Task] = None
+    client: Optional[WeatherMCPClient] = None
+
+
 class ChatBubble(Static):
     """A chat bubble widget for messages"""
 
@@ -23,12 +59,22 @@ class ChatBubble(Static):
         self.timestamp = timestamp or datetime.now().strftime("%H:%M")
         self.loading_indicator: Optional[LoadingIndicator] = None
 
-        # Add timestamp to content
-        formatted_content = f"{content}\n[dim]{self.timestamp}[/dim]"
+        # Message text is shown as-is (never parsed as markup, it comes from the
+        # user, the model and tools); kept as Content so streamed text can be appended
+        self._source = content
+        self._body = Content(content)
+        self._status = ""
 
         # Set classes based on message type
         classes = "user-bubble" if is_user else "assistant-bubble"
-        super().__init__(formatted_content, classes=classes)
+        super().__init__(self._with_timestamp(), classes=classes)
+
+    def _with_timestamp(self) -> Content:
+        lines = [self._body] if self._body.plain or not self._status else []
+        if self._status:
+            lines.append(Content.styled(self._status, "dim"))
+        lines.append(Content.styled(self.timestamp, "dim"))
+        return Content("\n").join(lines)
 
     def show_loading(self):
         """Show loading indicator inside this bubble"""
@@ -36,56 +82,250 @@ class ChatBubble(Static):
             self.loading_indicator = LoadingIndicator()
             self.mount(self.loading_indicator)
 
-    def hide_loading_and_set_content(self, content: str):
-        """Hide loading and update with final content"""
+    def hide_loading_and_set_content(self, content: str, status: str = ""):
+        """Hide loading and update with final content and an optional status line"""
         if self.loading_indicator:
             self.loading_indicator.remove()
             self.loading_indicator = None
 
+        # Streamed text only grows, so append just the new part
+        if content == self._source and status == self._status:
+            return
+        if content.startswith(self._source):
+            self._body = self._body + Content(content[len(self._source):])
+        else:
+            self._body = Content(content)
+        self._source = content
+        self._status = status
+
         # Update with final content and timestamp
-        formatted_content = f"{content}\n[dim]{self.timestamp}[/dim]"
-        self.update(formatted_content)
+        self.update(self._with_timestamp())
+
+    def show_message(self, message: ChatMessage):
+        """Reuse this bubble for another message"""
+        self.is_user = message.is_user
+        self.timestamp = message.timestamp
+        self.set_class(message.is_user, "user-bubble")
+        self.set_class(not message.is_user, "assistant-bubble")
+        self.hide_loading_and_set_content(message.content, message.status)
+        # Identical content skips the redraw above, but the timestamp may differ
+        self.update(self._with_timestamp())
+        if message.loading:
+            self.show_loading()
 
 
 class ChatArea(ScrollableContainer):
-    """Scrollable chat area containing all messages"""
+    """Scrollable chat log that only mounts bubbles near the viewport
+
+    Every message is kept as a ChatMessage in `messages`, but at most
+    WINDOW_SIZE bubbles exist; they show messages[window_start:] in order.
+    Scrolling close to either end of the window moves a page of bubbles from
+    the far end to the near one and refills them with the next messages, so
+    widgets are recycled rather than created, and the scroll offset is
+    corrected so the view doesn't jump.
+    """
 
     def __init__(self):
         super().__init__(id="chat-area")
-        self.current_assistant_bubble: Optional[ChatBubble] = None
-
-    def add_user_message(self, content: str):
-        """Add a user message bubble"""
-        bubble = ChatBubble(content, is_user=True)
+        self.messages: List[ChatMessage] = []
+        self.window_start = 0
+        self.current_response: Optional[int] = None
+        self._sliding = False
+
+        # Responses changed since the last frame, drawn together by _flush
+        self._dirty: Set[int] = set()
+        self._flush_timer: Optional[Timer] = None
+        self._last_flush = 0.0
+        self._last_scroll = 0.0
+
+    @property
+    def window_end(self) -> int:
+        return self.window_start + len(self.children)
+
+    def _bubble_for(self, index: int) -> Optional[ChatBubble]:
+        """The bubble showing a message, if it is in the window"""
+        if self.window_start <= index < self.window_end:
+            return self.children[index - self.window_start]
+        return None
+
+    def _append(self, message: ChatMessage) -> int:
+        """Store a message and show it at the end of the log"""
+        self.messages.append(message)
+        index = len(self.messages) - 1
+
+        if self.window_end < index:
+            # Scrolled back through history: jump the window to the newest messages
+            self._show_latest()
+        elif len(self.children) < WINDOW_SIZE:
+            self._mount_bubble(message)
+        else:
+            # Recycle the oldest bubble for the new message
+            bubble = self.children[0]
+            self.move_child(bubble, after=self.children[-1])
+            self.window_start += 1
+            bubble.show_message(message)
+
+        self._scroll_to_end()
+        return index
+
+    def _scroll_to_end(self):
+        """Follow new content, animating only when it doesn't arrive in a stream"""
+        now = time.monotonic()
+        animate = now - self._last_scroll >= SCROLL_ANIMATION_GAP
+        self._last_scroll = now
+        self.call_after_refresh(lambda: self.scroll_end(animate=animate))
+
+    def _show_latest(self):
+        self.window_start = max(0, len(self.messages) - WINDOW_SIZE)
+        for offset, bubble in enumerate(self.children):
+            bubble.show_message(self.messages[self.window_start + offset])
+        for message in self.messages[self.window_end:]:
+            self._mount_bubble(message)
+
+    def _mount_bubble(self, message: ChatMessage):
+        bubble = ChatBubble(message.content, message.is_user, message.timestamp)
         self.mount(bubble)
-        self.call_after_refresh(lambda: self.scroll_end(animate=True))
-        return bubble
+        if message.status:
+            bubble.hide_loading_and_set_content(message.content, message.status)
+        if message.loading:
+            bubble.show_loading()
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if self._sliding or not self.children:
+            return
+        margin = self.size.height
+        if new_value <= margin and self.window_start > 0:
+            self._slide_back()
+        elif new_value >= self.max_scroll_y - margin and self.window_end < len(self.messages):
+            self._slide_forward()
+
+    def _slide_back(self):
+        """Recycle the last bubbles to show earlier messages above the window"""
+        count = min(PAGE_SIZE, self.window_start, len(self.children) - 1)
+        anchor = self.children[0]
+        recycled = list(self.children[-count:])
+        self.window_start -= count
+        for offset, bubble in enumerate(recycled):
+            self.move_child(bubble, before=offset)
+            bubble.show_message(self.messages[self.window_start + offset])
+        self._keep_in_place(anchor, anchor.virtual_region.y)
+
+    def _slide_forward(self):
+        """Recycle the first bubbles to show later messages below the window"""
+        count = min(PAGE_SIZE, len(self.messages) - self.window_end, len(self.children) - 1)
+        anchor = self.children[count]
+        first_new = self.window_end
+        recycled = list(self.children[:count])
+        self.window_start += count
+        for offset, bubble in enumerate(recycled):
+            self.move_child(bubble, after=self.children[-1])
+            bubble.show_message(self.messages[first_new + offset])
+        self._keep_in_place(anchor, anchor.virtual_region.y)
+
+    def _keep_in_place(self, anchor: ChatBubble, anchor_y: int):
+        """After the next layout, scroll by however far the anchor bubble moved"""
+        self._sliding = True
+
+        def adjust():
+            self.scroll_to(y=self.scroll_y + anchor.virtual_region.y - anchor_y, animate=False, immediate=True)
+            self._sliding = False
+
+        self.call_after_refresh(adjust)
+
+    def add_user_message(self, content: str) -> int:
+        """Add a user message bubble"""
+        return self._append(ChatMessage(content, True, datetime.now().strftime("%H:%M")))
 
-    def add_assistant_message(self, content: str):
+    def add_assistant_message(self, content: str) -> int:
         """Add an assistant message bubble"""
-        bubble = ChatBubble(content, is_user=False)
-        self.mount(bubble)
-        self.call_after_refresh(lambda: self.scroll_end(animate=True))
-        return bubble
+        return self._append(ChatMessage(content, False, datetime.now().strftime("%H:%M")))
 
-    def start_assistant_response(self):
+    def start_assistant_response(self) -> int:
         """Start a new assistant response with loading indicator"""
-        # Create assistant bubble with loading
-        self.current_assistant_bubble = ChatBubble("", is_user=False)
-        self.mount(self.current_assistant_bubble)
-        self.current_assistant_bubble.show_loading()
-        self.call_after_refresh(lambda: self.scroll_end(animate=True))
-        return self.current_assistant_bubble
-
-    def finish_assistant_response(self, content: str):
-        """Finish the assistant response by replacing loading with content"""
-        if self.current_assistant_bubble:
-            self.current_assistant_bubble.hide_loading_and_set_content(content)
-            self.current_assistant_bubble = None
+        self.current_response = self._append(
+            ChatMessage("", False, datetime.now().strftime("%H:%M"), loading=True))
+        return self.current_response
+
+    def show_response_loading(self, index: int):
+        """Put the loading indicator back in a response bubble (e.g. once a queued query starts)"""
+        message = self.messages[index]
+        message.content = ""
+        message.status = ""
+        message.loading = True
+        bubble = self._bubble_for(index)
+        if bubble:
+            bubble.hide_loading_and_set_content("")
+            bubble.show_loading()
+
+    def update_assistant_response(self, content: str, index: Optional[int] = None, status: str = ""):
+        """Show partial content in a response bubble (the current one by default) while it streams
+
+        Content is shown as plain text; `status` is a dim line below it.
+        """
+        if index is None:
+            index = self.current_response
+        if index is None:
+            return
+        message = self.messages[index]
+        message.content = content
+        message.status = status
+        message.loading = False
+        self._dirty.add(index)
+
+        # Draw now if a frame is due, otherwise once the frame interval has passed
+        if self._flush_timer is None:
+            delay = self._last_flush + 1 / FRAME_RATE - time.monotonic()
+            if delay > 0:
+                self._flush_timer = self.set_timer(delay, self._flush)
+            else:
+                self._flush()
+
+    def _flush(self):
+        """Draw every response that changed since the last frame"""
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+        self._last_flush = time.monotonic()
+
+        # Take the batch first, so a failure drawing one bubble can't block later frames
+        dirty, self._dirty = self._dirty, set()
+        drawn = False
+        for index in dirty:
+            message = self.messages[index]
+            bubble = self._bubble_for(index)
+            if bubble and not message.loading:
+                bubble.hide_loading_and_set_content(message.content, message.status)
+                drawn = True
+        if drawn and self.window_end == len(self.messages):
+            self._scroll_to_end()
+
+    def finish_assistant_response(self, content: str, index: Optional[int] = None, status: str = ""):
+        """Finish a response (the current one by default) by replacing loading with content"""
+        if index is None:
+            index = self.current_response
+        if index is not None:
+            self.update_assistant_response(content, index, status)
+            # Show the final text without waiting for the next frame
+            if index in self._dirty:
+                self._flush()
+            if index == self.current_response:
+                self.current_response = None
         else:
             # Fallback: create new bubble
             self.add_assistant_message(content)
 
+    async def clear(self):
+        """Remove all messages and bubbles"""
+        self.messages = []
+        self.window_start = 0
+        self.current_response = None
+        self._dirty.clear()
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+        await self.remove_children()
+
 
 class QueryInput(HorizontalGroup):
     """A widget to get txet input from the user"""
@@ -184,13 +424,21 @@ class WeatherMan(App):
     BINDINGS = [
         ("ctrl+c", "quit", "Quit"),
         ("ctrl+l", "clear_conversation", "Clear Chat"),
+        ("escape", "cancel_query", "Cancel"),
     ]
 
     def __init__(self):
         super().__init__()
-        self.client = WeatherMCPClient()
+        # WEATHER_STANDBY=1 keeps a spare server process ready to take over if one dies
+        self.client = WeatherMCPClient(standby=os.getenv("WEATHER_STANDBY") == "1")
         self.connected = False
-        self.processing = False
+
+        # Questions wait in `queued` and up to max_in_flight are answered at once
+        # (WEATHER_MAX_IN_FLIGHT); extra ones run on forks of the client
+        self.max_in_flight = max(1, int(os.getenv("WEATHER_MAX_IN_FLIGHT", "1")))
+        self.queued: Deque[PendingQuery] = deque()
+        self.running: List[PendingQuery] = []
+        self._closing = False
 
     def compose(self) -> ComposeResult:
         """Create child widgets for the app"""
@@ -219,7 +467,8 @@ class WeatherMan(App):
         chat_area = self.query_one(ChatArea)
 
         try:
-            response = await self.client.connect("weather.py")
+            # WEATHER_SERVER_URL attaches to a shared server instead of spawning one
+            response = await self.client.connect(os.getenv("WEATHER_SERVER_URL", "weather.py"))
 
             if response.success:
                 self.connected = True
@@ -236,64 +485,115 @@ class WeatherMan(App):
 
     def on_query_input_submit_query(self, event: QueryInput.SubmitQuery) -> None:
         """Handle query submission from the input widget"""
-        # Run the async process_query in a task
-        asyncio.create_task(self.process_query(event.query))
+        self.submit_query(event.query)
 
-    async def process_query(self, query: str):
-        """Process user query and show response"""
+    def submit_query(self, query: str):
+        """Show the question and queue it to be answered"""
         query = query.strip()
-        if not query or self.processing:
+        if not query:
             return
 
-        self.processing = True
-        chat_area = self.query_one(ChatArea)
+        if len(self.queued) >= MAX_QUEUED_QUERIES:
+            # Hand the question back rather than dropping it
+            user_input = self.query_one("#user-input", Input)
+            if not user_input.value:
+                user_input.value = query
+            self.notify("Too many questions waiting, send it again in a moment.", severity="warning")
+            return
 
-        # Add user message
+        chat_area = self.query_one(ChatArea)
         chat_area.add_user_message(query)
-
-        # Show loading indicator
-        chat_area.start_assistant_response()
+        pending = PendingQuery(query, chat_area.start_assistant_response())
+        if len(self.running) >= self.max_in_flight:
+            chat_area.update_assistant_response("", pending.response, status="Queued...")
+        self.queued.append(pending)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start queued questions while there is room"""
+        while self.queued and len(self.running) < self.max_in_flight and not self._closing:
+            pending = self.queued.popleft()
+            # The main client keeps the conversation; parallel questions get a copy of it
+            if any(other.client is self.client for other in self.running):
+                pending.client = self.client.fork()
+            else:
+                pending.client = self.client
+            pending.task = asyncio.create_task(self.process_query(pending))
+            pending.task.add_done_callback(lambda _, pending=pending: self._finished(pending))
+            self.running.append(pending)
+
+    def _finished(self, pending: PendingQuery):
+        if pending in self.running:
+            self.running.remove(pending)
+        self._dispatch()
+
+    async def process_query(self, pending: PendingQuery):
+        """Answer a question in its response bubble"""
+        chat_area = self.query_one(ChatArea)
+        index = pending.response
+        chat_area.show_response_loading(index)
 
         try:
             if self.connected:
-                # Use MCP client for weather + general chat
-                response = await self.client.process_query(query)
-
-                if response.success:
-                    # Add assistant response (left side)
-                    chat_area.finish_assistant_response(response.content)
-
-                else:
-                    chat_area.finish_assistant_response(f"Error: {response.error}")
+                # Use MCP client for weather + general chat, filling the bubble as text streams in
+                streamed = ""
+                async for event in pending.client.stream_query(pending.query):
+                    if event.type == "text":
+                        streamed += event.text
+                        chat_area.update_assistant_response(streamed, index)
+                    elif event.type == "tool_call":
+                        chat_area.update_assistant_response(streamed, index, status=f"Using {event.tool}...")
+                    elif event.type == "done":
+                        # Add assistant response (left side)
+                        chat_area.finish_assistant_response(event.response.content, index)
+                    elif event.type == "error":
+                        chat_area.finish_assistant_response(f"Error: {event.response.error}", index)
             else:
                 # Fallback to basic response without weather tools
                 chat_area.finish_assistant_response(
                     "I don't have access to weather tools right now, but I'm here to chat! "
-                    "Try asking me about other topics or general questions."
+                    "Try asking me about other topics or general questions.",
+                    index
                 )
 
         except Exception as e:
-            chat_area.finish_assistant_response(f"Error: {str(e)}")
-        finally:
-            self.processing = False
-
-    def action_clear_conversation(self) -> None:
+            chat_area.finish_assistant_response(f"Error: {str(e)}", index)
+
+    def action_cancel_query(self) -> None:
+        """Cancel the oldest question being answered; queued ones move up"""
+        for pending in self.running:
+            if pending.task.cancel():
+                self.query_one(ChatArea).finish_assistant_response("", pending.response, status="Cancelled.")
+                return
+
+    async def _cancel_all(self):
+        """Drop queued questions, cancel running ones and wait for them to stop"""
+        self.queued.clear()
+        tasks = [pending.task for pending in self.running]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def action_clear_conversation(self) -> None:
         """Clear the conversation history and chat area"""
+        # Stop answering first, so cancelled questions leave the history before it is cleared
+        await self._cancel_all()
+
         # Clear the client's conversation memory
         if hasattr(self.client, 'clear_conversation'):
             self.client.clear_conversation()
 
         # Clear the chat area
         chat_area = self.query_one(ChatArea)
-        # Remove all children
-        for child in list(chat_area.children):
-            child.remove()
+        await chat_area.clear()
 
         # Add welcome message
         chat_area.add_assistant_message("Conversation cleared! How can I help you?")
 
     async def on_unmount(self):
         """Clean up when app closes"""
+        self._closing = True
+        await self._cancel_all()
         if hasattr(self, 'client'):
             await self.client.cleanup()
 